@@ -1,47 +1,153 @@
 #!/usr/bin/env python3
 """Background service for SnapMark with global hotkeys only."""
 
+import os
 import sys
 import signal
 import time
+import asyncio
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from pathlib import Path
+from typing import Optional
+
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    # uvloop is optional and not available on Windows; use the default loop
+    pass
+
+# Tesseract's OpenMP threading is slower than single-threaded OCR on most
+# inputs, and screenshots are already processed in parallel by the worker
+# pool. Export OMP_THREAD_LIMIT yourself to override.
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+os.environ.setdefault('OMP_NUM_THREADS', '1')
 
 from .core.screenshot import ScreenshotCapture
-from .core.ocr import OCRProcessor
-from .core.vlm import VLMProcessor
 from .core.markdown_generator import MarkdownGenerator
 from .core.hotkey import HotkeyManager
-from .core.mcp_client import MCPClient
-from .utils.search import SearchEngine
-from .config import ConfigManager
+from .utils.cache import ResultCache
+from .config import config
+
+# Minimum interval between two processed screenshot hotkey presses
+DEBOUNCE_SECONDS = 0.4
+
+# Number of screenshots that may be processed at the same time
+MAX_WORKERS = 2
+
+# Prefixes of OCR/VLM outputs that report a failure and must not be cached. OCR text is
+# only checked against its own prefix, since a screenshot may well start with "Error"
+OCR_ERROR_PREFIX = "OCR Error:"
+VLM_ERROR_PREFIXES = ("Error", "API Error", "OpenAI API Error", "Azure OpenAI API Error")
+
+logger = logging.getLogger(__name__)
+
+
+class _EventLog:
+    """Buffers the progress lines of one screenshot and logs them as a single record."""
+    
+    __slots__ = ("enabled", "lines")
+    
+    def __init__(self):
+        self.enabled = logger.isEnabledFor(logging.INFO)
+        self.lines = []
+    
+    def add(self, msg: str, *args):
+        # Skip the formatting work entirely when INFO is muted
+        if self.enabled:
+            self.lines.append(msg % args if args else msg)
+    
+    def flush(self):
+        if self.lines:
+            logger.info("\n".join(self.lines))
+        self.lines = []
+    
+    def error(self, msg: str, *args):
+        self.lines.append(msg % args if args else msg)
+        logger.error("\n".join(self.lines))
+        self.lines = []
 
 
 class BackgroundService:
-    def __init__(self, thread_mode=False):
-        # Configure logging to show MCP initialization details
+    def __init__(self, thread_mode=False, verbose=False):
+        # Per-screenshot progress and MCP initialization details are shown with verbose
         logging.basicConfig(
-            level=logging.INFO,
+            level=logging.INFO if verbose else logging.WARNING,
             format='%(levelname)s:%(name)s:%(message)s',
             force=True  # Override any existing logging configuration
         )
         
-        self.config = ConfigManager()
+        # Share the process-wide config that the core modules read from
+        self.config = config
         self.capture = ScreenshotCapture()
-        self.ocr = OCRProcessor()
-        self.vlm = VLMProcessor()
         self.md_gen = MarkdownGenerator()
         self.hotkey_manager = HotkeyManager()
-        self.search_engine = SearchEngine()
-        self.mcp_client = MCPClient()
+        self.result_cache = ResultCache(
+            self.config.config_dir / 'cache',
+            max_mb=self.config.get('storage.cache_max_mb', 100)
+        )
         self.running = False
         self.thread_mode = thread_mode
+        self._stop_event = threading.Event()
+        
+        # Coalesce bursty hotkey presses (key repeat, repeated presses)
+        self._last_ts = 0.0
+        self._in_flight = threading.BoundedSemaphore(MAX_WORKERS)
+        
+        # Screenshots are processed off the hotkey listener thread
+        self._pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='snapmark')
+        
+        self._load_flags()
+        
+        # Persistent event loop for the processing pipeline, shared across screenshots
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._loop_thread.start()
         
         # Setup signal handlers for graceful shutdown (only in main thread)
         if not thread_mode:
             signal.signal(signal.SIGINT, self._signal_handler)
             signal.signal(signal.SIGTERM, self._signal_handler)
     
+    # Heavyweight backends are imported on first use to keep startup fast
+    
+    @cached_property
+    def ocr(self):
+        from .core.ocr import OCRProcessor
+        return OCRProcessor()
+    
+    @cached_property
+    def vlm(self):
+        from .core.vlm import VLMProcessor
+        return VLMProcessor()
+    
+    @cached_property
+    def search_engine(self):
+        from .utils.search import SearchEngine
+        return SearchEngine()
+    
+    @cached_property
+    def mcp_client(self):
+        from .core.mcp_client import get_mcp_client
+        return get_mcp_client()
+    
+    def reload(self):
+        """Reload the config file and refresh the cached flags."""
+        self.config.config = self.config.load_config()
+        self._load_flags()
+    
+    def _load_flags(self):
+        """Snapshot the config flags used on the screenshot hot path."""
+        self._vlm_enabled = bool(self.config.get('vlm.enabled', False))
+        # Only load the MCP client when MCP is switched on
+        self._mcp_enabled = bool(self.config.get('mcp.enabled', False)) and self.mcp_client.is_enabled()
+        self._mcp_prompt = self.config.get('mcp.default_prompt')
+        self._img_format = self.config.get('storage.image_format', 'png')
+        self._img_quality = int(self.config.get('storage.image_quality', 85))
+    
     def _signal_handler(self, signum, frame):
         print(f"\nReceived signal {signum}, shutting down...")
         self.stop()
@@ -60,69 +166,137 @@ class BackgroundService:
             return False
     
     def take_screenshot(self):
+        """Queue a screenshot on the worker pool and return immediately."""
+        now = time.monotonic()
+        if now - self._last_ts < DEBOUNCE_SECONDS:
+            return
+        if not self._in_flight.acquire(blocking=False):
+            logger.info("Screenshots already in progress, ignoring hotkey")
+            return
+        self._last_ts = now
+        
+        try:
+            self._pool.submit(self._do_screenshot)
+        except RuntimeError:
+            # Pool already shut down
+            self._in_flight.release()
+    
+    def _do_screenshot(self):
         """Take a screenshot and process it."""
+        log = _EventLog()
         try:
-            print("📸 Taking screenshot...")
+            log.add("📸 Taking screenshot...")
             
             # Capture screenshot
-            image_path = self.capture.capture_screen()
-            print(f"   Screenshot saved: {Path(image_path).name}")
-            
-            # Process with OCR
-            ocr_text = self.ocr.extract_text(image_path)
-            print(f"   OCR processed: {len(ocr_text)} characters extracted")
-            
-            # Process with VLM if enabled and available
-            vlm_description = None
-            config = self.config.config
-            if config.get('vlm', {}).get('enabled', False):
-                if self.vlm.is_available():
-                    print("   Generating VLM description...")
-                    vlm_description = self.vlm.describe_image(image_path)
-                    print(f"   VLM description generated: {len(vlm_description)} characters")
-                else:
-                    print("   VLM enabled but service not available")
+            image_path = self.capture.capture_screen(
+                image_format=self._img_format, quality=self._img_quality
+            )
+            log.add("   Screenshot saved: %s", Path(image_path).name)
             
-            # Generate Markdown
-            md_path = self.md_gen.create_markdown_note(image_path, ocr_text, vlm_description)
-            print(f"   Markdown created: {Path(md_path).name}")
-            
-            # Index for search
-            self.search_engine.index_note(md_path)
-            print("   Note indexed for search")
-            
-            # Process with MCP servers if enabled
-            if self.mcp_client.is_enabled():
-                print("   Processing with MCP servers...")
-                try:
-                    import asyncio
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    
-                    # Get custom prompt from config to trigger mcp-use agent processing
-                    custom_prompt = self.config.get('mcp.default_prompt')
-                    
-                    mcp_results = loop.run_until_complete(
-                        self.mcp_client.process_screenshot_data(
-                            image_path, md_path, ocr_text, vlm_description, custom_prompt
-                        )
-                    )
-                    loop.close()
-                    
-                    for server_name, result in mcp_results.items():
-                        if "error" in result:
-                            print(f"   MCP {server_name}: Error - {result['error']}")
-                        else:
-                            print(f"   MCP {server_name}: Success")
-                            
-                except Exception as e:
-                    print(f"   MCP processing failed: {e}")
+            # Run the processing pipeline on the persistent event loop
+            future = asyncio.run_coroutine_threadsafe(self._process(image_path, log), self._loop)
+            future.result()
             
             # Show notification-style message
-            print(f"✅ Screenshot processed successfully!")
+            log.add("✅ Screenshot processed successfully!")
+            log.flush()
             
         except Exception as e:
-            print(f"❌ Error taking screenshot: {e}")
+            log.error("❌ Error taking screenshot: %s", e)
+        finally:
+            self._in_flight.release()
+    
+    async def _process(self, image_path: str, log: _EventLog):
+        """Run OCR and VLM concurrently, then generate the note and dispatch to MCP."""
+        # Read the image once and share the bytes between hashing, OCR and VLM
+        image_data = await asyncio.to_thread(Path(image_path).read_bytes)
+        
+        # Reuse OCR/VLM results from an identical earlier screenshot
+        image_hash, cached, vlm_key = await asyncio.to_thread(self._lookup_cached, image_data)
+        
+        async def run_ocr():
+            if 'ocr' in cached:
+                log.add("   OCR result loaded from cache")
+                return cached['ocr']
+            return await asyncio.to_thread(self.ocr.extract_text, image_path, image_data=image_data)
+        
+        async def run_vlm():
+            if self._vlm_enabled and cached.get('vlm_model') == vlm_key:
+                log.add("   VLM description loaded from cache")
+                return cached['vlm']
+            return await asyncio.to_thread(self._describe_image, image_path, log, image_data)
+        
+        ocr_text, vlm_description = await asyncio.gather(run_ocr(), run_vlm())
+        log.add("   OCR processed: %d characters extracted", len(ocr_text))
+        
+        entry = dict(cached)
+        if not ocr_text.startswith(OCR_ERROR_PREFIX):
+            entry['ocr'] = ocr_text
+        if vlm_description and not vlm_description.startswith(VLM_ERROR_PREFIXES):
+            entry['vlm'] = vlm_description
+            entry['vlm_model'] = vlm_key
+        if entry != cached:
+            await asyncio.to_thread(self.result_cache.put, image_hash, entry)
+        
+        # Generate Markdown and index it for search
+        md_path = await asyncio.to_thread(self._write_note, image_path, ocr_text, vlm_description, log)
+        
+        # Process with MCP servers if enabled
+        if self._mcp_enabled:
+            log.add("   Processing with MCP servers...")
+            try:
+                # Custom prompt from config triggers mcp-use agent processing. The client
+                # bounds each server (mcp.timeout) and the agent (mcp.agent_timeout) itself,
+                # so its per-server timeout results are reported below
+                mcp_results = await self.mcp_client.process_screenshot_data(
+                    image_path, md_path, ocr_text, vlm_description, self._mcp_prompt
+                )
+                
+                for server_name, result in mcp_results.items():
+                    if "error" in result:
+                        # Warnings, so failures show up with the default (WARNING) log level
+                        logger.warning("MCP %s failed for %s: %s",
+                                       server_name, Path(image_path).name, result['error'])
+                    else:
+                        log.add("   MCP %s: Success", server_name)
+                        
+            except Exception as e:
+                logger.warning("MCP processing failed for %s: %s: %s",
+                               Path(image_path).name, type(e).__name__, e)
+    
+    # Blocking steps of _process, run on worker threads so they don't stall the shared
+    # loop while another screenshot is in flight
+    
+    def _lookup_cached(self, image_data: bytes):
+        """Hash the image and return (hash, cached entry, VLM cache key)."""
+        image_hash = ResultCache.hash_bytes(image_data)
+        cached = self.result_cache.get(image_hash) or {}
+        vlm_key = f"{self.vlm.provider.value}:{self.vlm.model}" if self._vlm_enabled else None
+        return image_hash, cached, vlm_key
+    
+    def _write_note(self, image_path: str, ocr_text: str, vlm_description: Optional[str],
+                    log: _EventLog) -> str:
+        """Write the Markdown note and index it for search."""
+        md_path = self.md_gen.create_markdown_note(image_path, ocr_text, vlm_description)
+        log.add("   Markdown created: %s", Path(md_path).name)
+        
+        self.search_engine.index_note(md_path)
+        log.add("   Note indexed for search")
+        return md_path
+    
+    def _describe_image(self, image_path: str, log: _EventLog, image_data: Optional[bytes] = None):
+        """Generate a VLM description if VLM is enabled and available."""
+        if not self._vlm_enabled:
+            return None
+        
+        if not self.vlm.is_available():
+            log.add("   VLM enabled but service not available")
+            return None
+        
+        log.add("   Generating VLM description...")
+        vlm_description = self.vlm.describe_image(image_path, image_data=image_data)
+        log.add("   VLM description generated: %d characters", len(vlm_description))
+        return vlm_description
     
     def take_region_screenshot(self):
         """Placeholder for region screenshot."""
@@ -147,8 +321,7 @@ class BackgroundService:
         
         try:
             # Keep the service running
-            while self.running:
-                time.sleep(1)
+            self._stop_event.wait()
         except KeyboardInterrupt:
             if not self.thread_mode:
                 self.stop()
@@ -159,13 +332,27 @@ class BackgroundService:
         """Stop the background service."""
         print("\n🛑 Stopping background service...")
         self.running = False
+        self._stop_event.set()
         self.hotkey_manager.stop_listening()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.config.flush()
+        if 'ocr' in self.__dict__:
+            from .core.ocr import close_engines
+            close_engines()
+        if self._loop.is_running():
+            # Shut down pooled MCP server processes if the client was ever loaded
+            if 'mcp_client' in self.__dict__:
+                try:
+                    asyncio.run_coroutine_threadsafe(self.mcp_client.close(), self._loop).result(timeout=10)
+                except Exception as e:
+                    print(f"Error closing MCP sessions: {e}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
         print("✅ Service stopped")
 
 
 def run_background_service():
     """Run the background service."""
-    service = BackgroundService()
+    service = BackgroundService(verbose='--verbose' in sys.argv[1:])
     return service.start()
 
 
@@ -1,14 +1,44 @@
 import os
+import copy
+import threading
 from pathlib import Path
 from typing import Dict, Any
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DEFAULT_CONFIG_FILE = str(Path.home() / '.snapmark2' / 'config.json')
+
+# Delay before changes made through set() are written to disk
+SAVE_DELAY_SECONDS = 0.25
+
 
 class Config:
+    # One shared instance per config file, so the JSON is parsed once per process
+    _instances: Dict[str, 'Config'] = {}
+    
+    def __new__(cls, config_file: str = None):
+        key = config_file or DEFAULT_CONFIG_FILE
+        instance = cls._instances.get(key)
+        if instance is None:
+            instance = super().__new__(cls)
+            cls._instances[key] = instance
+        return instance
+    
     def __init__(self, config_file: str = None):
-        self.config_file = config_file or str(Path.home() / '.snapmark2' / 'config.json')
+        if getattr(self, '_initialized', False):
+            return
+        self._initialized = True
+        
+        self.config_file = config_file or DEFAULT_CONFIG_FILE
+        self._save_timer = None
+        self._save_lock = threading.Lock()
         self.config_dir = Path(self.config_file).parent
-        self.config_dir.mkdir(exist_ok=True)
+        if not self.config_dir.exists():
+            self.config_dir.mkdir(parents=True, exist_ok=True)
         
         self.defaults = {
             "output_directory": "SnapMarkData",
@@ -58,28 +88,62 @@ class Config:
                 "startup_minimized": False
             },
             "storage": {
-                "image_quality": 85,
-                "auto_cleanup_days": 0  # 0 = disabled
+                "image_format": "png",  # "png" (lossless, best for OCR) or "jpeg"
+                "image_quality": 85,  # JPEG quality
+                "auto_cleanup_days": 0,  # 0 = disabled
+                "cache_max_mb": 100  # On-disk OCR/VLM result cache size
             }
         }
         
+        # Bumped on every change so callers can cache values derived from the config
+        self.version = 0
         self.config = self.load_config()
     
+    @property
+    def config(self) -> Dict[str, Any]:
+        return self._config
+    
+    @config.setter
+    def config(self, value: Dict[str, Any]):
+        self._config = value
+        self.version += 1
+        self._flat = {}
+        self._flatten(value, "")
+    
+    def _flatten(self, value: Any, prefix: str):
+        """Index every nested key of ``value`` under its dotted path in ``self._flat``."""
+        for key, item in value.items():
+            path = f"{prefix}{key}"
+            self._flat[path] = item
+            if isinstance(item, dict):
+                self._flatten(item, f"{path}.")
+    
     def _deep_merge(self, base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
         """Deep merge two dictionaries, with override values taking precedence."""
-        result = base.copy()
-        for key, value in override.items():
-            if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-                result[key] = self._deep_merge(result[key], value)
-            else:
-                result[key] = value
+        # Copy base once, then merge in place with an explicit stack
+        result = copy.deepcopy(base)
+        stack = [(result, override)]
+        while stack:
+            dst, src = stack.pop()
+            if src is dst:
+                continue
+            for key, value in src.items():
+                current = dst.get(key)
+                if isinstance(current, dict) and isinstance(value, dict):
+                    stack.append((current, value))
+                else:
+                    dst[key] = value
         return result
     
     def load_config(self) -> Dict[str, Any]:
         if os.path.exists(self.config_file):
             try:
-                with open(self.config_file, 'r') as f:
-                    user_config = json.load(f)
+                if orjson:
+                    with open(self.config_file, 'rb') as f:
+                        user_config = orjson.loads(f.read())
+                else:
+                    with open(self.config_file, 'r') as f:
+                        user_config = json.load(f)
                 # Deep merge with defaults
                 config = self._deep_merge(self.defaults, user_config)
                 return config
@@ -88,39 +152,67 @@ class Config:
         
         # Save defaults if config doesn't exist
         self.save_config(self.defaults)
-        return self.defaults.copy()
+        return copy.deepcopy(self.defaults)
     
     def save_config(self, config: Dict[str, Any] = None):
         config = config or self.config
+        if orjson:
+            data = orjson.dumps(config, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(config, indent=2).encode()
+        
+        # Write to a temp file and rename so a crash never leaves a truncated config
+        tmp_file = self.config_file + '.tmp'
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(config, f, indent=2)
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.config_file)
         except IOError as e:
             print(f"Failed to save config: {e}")
     
+    def flush(self):
+        """Write any pending changes from set() to disk immediately."""
+        with self._save_lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer:
+            timer.cancel()
+            self.save_config()
+    
+    def _schedule_save(self):
+        # Coalesce bursts of set() calls into a single write
+        with self._save_lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(SAVE_DELAY_SECONDS, self.flush)
+            self._save_timer.start()
+    
     def get(self, key: str, default=None):
-        keys = key.split('.')
-        value = self.config
-        
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
-        
-        return value
+        return self._flat.get(key, default)
     
     def set(self, key: str, value):
         keys = key.split('.')
         config = self.config
         
-        for k in keys[:-1]:
+        for i, k in enumerate(keys[:-1]):
             if k not in config:
                 config[k] = {}
+                self._flat['.'.join(keys[:i + 1])] = config[k]
             config = config[k]
         
         config[keys[-1]] = value
-        self.save_config()
+        
+        # Drop stale entries below this key before re-indexing the new value
+        prefix = f"{key}."
+        for stale in [k for k in self._flat if k.startswith(prefix)]:
+            del self._flat[stale]
+        self._flat[key] = value
+        if isinstance(value, dict):
+            self._flatten(value, prefix)
+        self.version += 1
+        
+        self._schedule_save()
     
     def get_output_dir(self) -> str:
         return os.path.expanduser(self.get("output_directory", "SnapMarkData"))
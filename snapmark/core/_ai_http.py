@@ -0,0 +1,238 @@
+"""Shared HTTP connection pools and SDK clients for AI providers.
+
+Clients are cached per credentials so repeated AIChat/VLM instances reuse open
+connections instead of paying a new TCP+TLS handshake on every request.
+"""
+
+import asyncio
+import atexit
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional
+
+_MAX_CLIENTS = 16
+
+
+class _Entry(NamedTuple):
+    client: Any
+    # False for SDK clients wrapping a shared httpx client, which must stay open
+    owns_connections: bool
+    # Loop of an async client, whose connections can only be closed there
+    loop: Optional["weakref.ref[asyncio.AbstractEventLoop]"]
+
+
+# Reentrant: client factories fetch the shared httpx client while the lock is held
+_lock = threading.RLock()
+_clients: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+# Finalizers forgetting the clients of a loop once it is garbage collected, by id(loop)
+_loop_finalizers: Dict[int, weakref.finalize] = {}
+# Shared httpx.AsyncClient per loop, by id(loop). Kept out of the LRU: SDK clients wrap
+# it, so it must live as long as its loop
+_async_http_clients: Dict[int, Any] = {}
+_http_client = None
+_ollama_session = None
+
+
+def _get_cached(key: Hashable, factory: Callable[[], Any], owns_connections: bool = True,
+                loop: Optional[asyncio.AbstractEventLoop] = None) -> Any:
+    """Return the cached client for key, creating it with factory on a miss.
+    
+    Clients pushed out of the cache are closed, async ones on their own loop.
+    """
+    dropped: List[_Entry] = []
+    with _lock:
+        entry = _clients.get(key)
+        if entry is not None:
+            _clients.move_to_end(key)
+            return entry.client
+
+        entry = _Entry(factory(), owns_connections, weakref.ref(loop) if loop else None)
+        _clients[key] = entry
+        while len(_clients) > _MAX_CLIENTS:
+            dropped.append(_clients.popitem(last=False)[1])
+
+    for old in dropped:
+        _close_entry(old)
+    return entry.client
+
+
+def _close_entry(entry: _Entry):
+    """Close an evicted client, unless it only wraps a shared connection pool."""
+    if not entry.owns_connections:
+        return
+    try:
+        if entry.loop is None:
+            entry.client.close()
+            return
+        loop = entry.loop()
+        if loop is None or loop.is_closed():
+            return
+        # httpx.AsyncClient has aclose(); the async SDK clients have a close() coroutine
+        close = getattr(entry.client, "aclose", None) or entry.client.close
+        loop.call_soon_threadsafe(lambda: loop.create_task(close()))
+    except Exception:
+        # Best effort: a client that fails to close is dropped anyway
+        pass
+
+
+def _get_loop_cached(key: tuple, factory: Callable[[], Any], owns_connections: bool = True) -> Any:
+    """_get_cached for a client bound to the running event loop.
+    
+    Keyed by id(loop), with a finalizer that forgets the loop's clients when it is
+    collected, so the cache does not keep dead loops alive.
+    """
+    loop = _track_loop()
+    return _get_cached(("loop", id(loop)) + key, factory, owns_connections, loop)
+
+
+def _track_loop() -> asyncio.AbstractEventLoop:
+    """Return the running loop, registering a finalizer for it on first use."""
+    loop = asyncio.get_running_loop()
+    loop_id = id(loop)
+    with _lock:
+        if loop_id not in _loop_finalizers:
+            # A closed loop may be kept alive by its clients' open connections, so also
+            # forget closed loops whenever a new one shows up
+            for old_id, old_finalizer in list(_loop_finalizers.items()):
+                alive = old_finalizer.peek()
+                if alive is None or alive[0].is_closed():
+                    old_finalizer.detach()
+                    _forget_loop(old_id)
+            finalizer = weakref.finalize(loop, _forget_loop, loop_id)
+            finalizer.atexit = False
+            _loop_finalizers[loop_id] = finalizer
+    return loop
+
+
+def _forget_loop(loop_id: int):
+    """Drop the clients of a garbage-collected or closed loop."""
+    with _lock:
+        _loop_finalizers.pop(loop_id, None)
+        _async_http_clients.pop(loop_id, None)
+        for key in [key for key in _clients if key[:2] == ("loop", loop_id)]:
+            del _clients[key]
+
+
+def get_http_client():
+    """Shared keep-alive httpx client used by the OpenAI SDK clients."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            import httpx
+
+            try:
+                import h2  # noqa: F401
+                http2 = True
+            except ImportError:
+                http2 = False
+
+            _http_client = httpx.Client(
+                http2=http2,
+                timeout=httpx.Timeout(600.0, connect=10.0),
+                limits=httpx.Limits(max_connections=64, keepalive_expiry=300)
+            )
+        return _http_client
+
+
+def get_async_http_client():
+    """Shared keep-alive httpx.AsyncClient for the running event loop.
+    
+    Async connections belong to the loop that opened them, so there is one client
+    per loop; callers should run their requests on a long-lived loop.
+    """
+    loop_id = id(_track_loop())
+    with _lock:
+        client = _async_http_clients.get(loop_id)
+        if client is None:
+            import httpx
+
+            try:
+                import h2  # noqa: F401
+                http2 = True
+            except ImportError:
+                http2 = False
+
+            client = httpx.AsyncClient(
+                http2=http2,
+                timeout=httpx.Timeout(600.0, connect=10.0),
+                limits=httpx.Limits(max_connections=64, keepalive_expiry=300)
+            )
+            _async_http_clients[loop_id] = client
+        return client
+
+
+def get_async_client(key: Hashable, factory: Callable[[], Any], owns_connections: bool = True) -> Any:
+    """Shared async SDK client for key on the running event loop, created with factory on a miss.
+    
+    Pass owns_connections=False for clients built on get_async_http_client(), so
+    evicting them does not close the loop's shared httpx client.
+    """
+    return _get_loop_cached(("async",) + tuple(key), factory, owns_connections)
+
+
+def get_openai_client(api_key: str):
+    """Shared OpenAI client for an API key."""
+    def factory():
+        from openai import OpenAI
+        return OpenAI(api_key=api_key, http_client=get_http_client())
+
+    return _get_cached(("openai", api_key), factory, owns_connections=False)
+
+
+def get_azure_openai_client(api_key: str, endpoint: str, api_version: str):
+    """Shared Azure OpenAI client for a key, endpoint and API version."""
+    def factory():
+        from openai import AzureOpenAI
+        return AzureOpenAI(
+            api_key=api_key,
+            azure_endpoint=endpoint,
+            api_version=api_version,
+            http_client=get_http_client()
+        )
+
+    return _get_cached(("azure_openai", api_key, endpoint, api_version), factory,
+                       owns_connections=False)
+
+
+def get_anthropic_client(api_key: str):
+    """Shared Anthropic client for an API key."""
+    def factory():
+        import anthropic
+        return anthropic.Anthropic(api_key=api_key)
+
+    return _get_cached(("anthropic", api_key), factory)
+
+
+def get_ollama_session():
+    """Shared requests session with a keep-alive connection pool for Ollama."""
+    global _ollama_session
+    with _lock:
+        if _ollama_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["Connection"] = "keep-alive"
+            _ollama_session = session
+        return _ollama_session
+
+
+@atexit.register
+def close_all():
+    """Close the shared connection pools."""
+    global _http_client, _ollama_session
+    with _lock:
+        for entry in _clients.values():
+            if entry.loop is None:
+                _close_entry(entry)
+        _clients.clear()
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+        if _ollama_session is not None:
+            _ollama_session.close()
+            _ollama_session = None
@@ -0,0 +1,300 @@
+"""Response caches for AI chat.
+
+Identical requests (same provider, model, messages and max_tokens) are answered
+from memory, and optionally from a SQLite file that survives restarts. An opt-in
+semantic tier also answers text-only prompts that are close paraphrases of an
+earlier one.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Delay before new semantic cache entries are written to disk, so bursts of puts
+# share one write made off the request path
+SEMANTIC_SAVE_DELAY_SECONDS = 2.0
+
+
+def make_key(**request: Any) -> str:
+    """Hash a request description into a stable cache key."""
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ExactLLMCache:
+    """In-process LRU of responses with an optional persistent SQLite tier."""
+
+    def __init__(self, maxsize: int = 512, db_path: Optional[str] = None):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.db_path = db_path
+        if db_path:
+            self._init_db()
+
+    def _init_db(self):
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT,
+                created_at INTEGER
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+                return response
+
+        if not self.db_path:
+            return None
+
+        try:
+            conn = sqlite3.connect(self.db_path)
+            row = conn.execute('SELECT response FROM responses WHERE key = ?', (key,)).fetchone()
+            conn.close()
+        except sqlite3.Error:
+            return None
+
+        if row is None:
+            return None
+        self._remember(key, row[0])
+        return row[0]
+
+    def put(self, key: str, response: str):
+        self._remember(key, response)
+
+        if not self.db_path:
+            return
+
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute(
+                'INSERT OR REPLACE INTO responses (key, response, created_at) VALUES (?, ?, ?)',
+                (key, response, int(time.time()))
+            )
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"Failed to write response cache: {e}")
+
+    def _remember(self, key: str, response: str):
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SemanticCache:
+    """Nearest-neighbour lookup of responses by prompt embedding similarity.
+
+    When persisted, embeddings go to the ``.npz`` file at ``path`` and the scopes and
+    responses to a JSON file next to it.
+    """
+
+    def __init__(self, embed: Callable[[str], Any], threshold: float = 0.85,
+                 max_entries: int = 2048, path: Optional[str] = None):
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = path
+        self._lock = threading.Lock()
+        # Unit-normalised embeddings, one row per entry, so cosine is a dot product.
+        # Replaced rather than modified in place, so a saver can hold on to a snapshot
+        self._matrix = None
+        self._scopes: List[str] = []
+        self._responses: List[str] = []
+        self._save_timer = None
+        # Serialises writers, so the two files always come from the same save
+        self._write_lock = threading.Lock()
+        if path:
+            self._load()
+
+    def _embed(self, prompt: str):
+        vector = np.asarray(self.embed(prompt), dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, scope: str, prompt: str) -> Optional[str]:
+        """Return the stored response for the most similar prompt within scope."""
+        with self._lock:
+            if self._matrix is None:
+                return None
+        query = self._embed(prompt)
+
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != query.shape[0]:
+                return None
+            sims = self._matrix @ query
+            # Only entries for the same provider and model are eligible
+            mask = np.fromiter((s == scope for s in self._scopes), dtype=bool, count=len(self._scopes))
+            if not mask.any():
+                return None
+            sims = np.where(mask, sims, -1.0)
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold:
+                return self._responses[best]
+        return None
+
+    def put(self, scope: str, prompt: str, response: str):
+        vector = self._embed(prompt)[np.newaxis, :]
+
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != vector.shape[1]:
+                self._matrix = vector
+                self._scopes = [scope]
+                self._responses = [response]
+            else:
+                self._matrix = np.vstack([self._matrix, vector])
+                self._scopes.append(scope)
+                self._responses.append(response)
+
+            # Drop the oldest entries once over capacity
+            overflow = len(self._responses) - self.max_entries
+            if overflow > 0:
+                self._matrix = self._matrix[overflow:]
+                del self._scopes[:overflow]
+                del self._responses[:overflow]
+
+            if self.path and self._save_timer is None:
+                self._save_timer = threading.Timer(SEMANTIC_SAVE_DELAY_SECONDS, self.flush)
+                self._save_timer.start()
+
+    @property
+    def _text_path(self) -> Path:
+        return Path(self.path).with_suffix('.json')
+
+    def _load(self):
+        try:
+            with open(self._text_path, 'r', encoding='utf-8') as f:
+                text = json.load(f)
+            with np.load(self.path, allow_pickle=False) as data:
+                matrix = data['matrix'].astype(np.float32)
+                generation = str(data['generation'])
+        except (OSError, KeyError, ValueError):
+            return
+
+        # Both files come from the same save, or neither is used
+        if generation != text.get('generation') or not (
+                len(matrix) == len(text.get('scopes', ())) == len(text.get('responses', ()))):
+            return
+        self._matrix = matrix
+        self._scopes = text['scopes']
+        self._responses = text['responses']
+
+    def flush(self):
+        """Write pending entries to disk now."""
+        with self._lock:
+            timer, self._save_timer = self._save_timer, None
+            matrix, scopes, responses = self._matrix, list(self._scopes), list(self._responses)
+        if timer is None or matrix is None:
+            return
+        timer.cancel()
+
+        # Written outside the lock so lookups are not held up by disk I/O
+        with self._write_lock:
+            self._write(matrix, scopes, responses)
+
+    def _write(self, matrix, scopes: List[str], responses: List[str]):
+        generation = uuid.uuid4().hex
+        directory = Path(self.path).parent
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_text = tempfile.mkstemp(dir=directory, suffix='.json.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'generation': generation, 'scopes': scopes, 'responses': responses},
+                          f, ensure_ascii=False)
+            fd, tmp_matrix = tempfile.mkstemp(dir=directory, suffix='.npz.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, matrix=matrix, generation=np.array(generation))
+            os.replace(tmp_text, self._text_path)
+            os.replace(tmp_matrix, self.path)
+        except OSError as e:
+            print(f"Failed to write semantic cache: {e}")
+
+
+def _load_embedder(model_name: str) -> Optional[Callable[[str], Any]]:
+    """Local sentence-transformers embedder, or None if it is not installed."""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+
+    model = SentenceTransformer(model_name)
+    return lambda text: model.encode(text, normalize_embeddings=True)
+
+
+_shared_cache: Optional[ExactLLMCache] = None
+_shared_semantic_cache: Optional[SemanticCache] = None
+_semantic_cache_loaded = False
+_shared_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ExactLLMCache]:
+    """Shared response cache configured from ai_chat.*, or None when disabled."""
+    global _shared_cache
+    from ..config import config
+
+    if not config.get("ai_chat.response_cache", True):
+        return None
+
+    with _shared_lock:
+        if _shared_cache is None:
+            db_path = None
+            if config.get("ai_chat.response_cache_persist", False):
+                db_path = str(config.config_dir / 'llm_cache.db')
+            _shared_cache = ExactLLMCache(
+                maxsize=config.get("ai_chat.response_cache_size", 512),
+                db_path=db_path
+            )
+        return _shared_cache
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Shared semantic cache, or None when disabled or its dependencies are missing."""
+    global _shared_semantic_cache, _semantic_cache_loaded
+    from ..config import config
+
+    if np is None or not config.get("ai_chat.semantic_cache", False):
+        return None
+
+    with _shared_lock:
+        if not _semantic_cache_loaded:
+            _semantic_cache_loaded = True
+            embed = _load_embedder(
+                config.get("ai_chat.semantic_cache_model", "sentence-transformers/all-MiniLM-L6-v2")
+            )
+            if embed is None:
+                print("Semantic cache disabled: sentence-transformers is not installed")
+            else:
+                _shared_semantic_cache = SemanticCache(
+                    embed,
+                    threshold=config.get("ai_chat.semantic_cache_threshold", 0.85),
+                    path=str(config.config_dir / 'semantic_cache.npz')
+                )
+        return _shared_semantic_cache
@@ -1,9 +1,53 @@
 import os
-from typing import List, Dict, Any, Optional
+import json
+import asyncio
+import mimetypes
+from collections import OrderedDict
+from functools import lru_cache
+from collections.abc import Sequence
+from typing import List, Dict, Any, Optional, AsyncIterator, Union
 from enum import Enum
-import base64
 from pathlib import Path
 
+try:
+    # SIMD-accelerated base64 for large screenshot payloads
+    from pybase64 import b64encode
+except ImportError:
+    from base64 import b64encode
+
+from ._ai_http import (
+    get_openai_client, get_azure_openai_client, get_anthropic_client, get_ollama_session,
+    get_async_client, get_async_http_client
+)
+from .ai_cache import make_key, get_response_cache, get_semantic_cache
+
+MAX_TOKENS = 2000
+
+# Image attachments kept in memory, as base64 and as raw Gemini parts
+IMAGE_B64_CACHE_SIZE = 16
+GEMINI_IMAGE_CACHE_SIZE = 16
+
+# Provider failures reported as text rather than raised; never cached
+_ERROR_PREFIXES = ("Ollama error:", "Provider ")
+
+# Batch requests retry rate limits and timeouts with exponential backoff
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 1.0
+_RETRYABLE_ERRORS = {
+    "RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError",
+    "TimeoutException", "ConnectTimeout", "ReadTimeout", "ResourceExhausted"
+}
+
+
+def _image_mime_type(image_path: str) -> str:
+    """MIME type of a screenshot from its extension (PNG or JPEG, per storage.image_format)"""
+    return mimetypes.guess_type(image_path)[0] or "image/png"
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether an SDK error is transient (rate limit, timeout, dropped connection)"""
+    return isinstance(error, TimeoutError) or type(error).__name__ in _RETRYABLE_ERRORS
+
 class AIProvider(Enum):
     OPENAI = "openai"
     AZURE_OPENAI = "azure_openai"
@@ -11,65 +55,152 @@ class AIProvider(Enum):
     GEMINI = "gemini"
     OLLAMA = "ollama"
 
+_PROVIDERS = {provider.value: provider for provider in AIProvider}
+
+# Provider implied by a model name prefix, checked in order
+_PROVIDER_BY_PREFIX = {
+    "gpt": AIProvider.OPENAI,
+    "o1": AIProvider.OPENAI,
+    "claude": AIProvider.CLAUDE,
+    "gemini": AIProvider.GEMINI,
+}
+
+
+def _lookup_provider(value: str) -> AIProvider:
+    try:
+        return _PROVIDERS[value]
+    except KeyError:
+        raise ValueError(f"'{value}' is not a valid AIProvider")
+
+
+@lru_cache(maxsize=8)
+def _resolve_credentials(provider: AIProvider, config_version: int) -> Dict[str, Optional[str]]:
+    """Resolve a provider's credentials from config and environment
+    
+    config_version is only part of the cache key, so entries are dropped whenever the config changes.
+    """
+    from ..config import config
+    
+    if provider == AIProvider.OPENAI:
+        # Check ai_chat key first, then fallback to vlm key, then environment
+        return {
+            "api_key": (config.get("ai_chat.openai_api_key") or
+                        config.get("vlm.openai_api_key") or
+                        os.getenv("OPENAI_API_KEY"))
+        }
+    elif provider == AIProvider.AZURE_OPENAI:
+        # Check ai_chat keys first, then fallback to vlm keys, then environment
+        return {
+            "api_key": (config.get("ai_chat.azure_api_key") or
+                        config.get("vlm.azure_api_key") or
+                        os.getenv("AZURE_OPENAI_API_KEY")),
+            "endpoint": (config.get("ai_chat.azure_endpoint") or
+                         config.get("vlm.azure_endpoint") or
+                         os.getenv("AZURE_OPENAI_ENDPOINT")),
+            "api_version": config.get("ai_chat.azure_api_version",
+                                      config.get("vlm.azure_api_version", "2024-02-01"))
+        }
+    elif provider == AIProvider.CLAUDE:
+        return {"api_key": config.get("ai_chat.claude_api_key") or os.getenv("ANTHROPIC_API_KEY")}
+    elif provider == AIProvider.GEMINI:
+        return {"api_key": config.get("ai_chat.gemini_api_key") or os.getenv("GOOGLE_API_KEY")}
+    elif provider == AIProvider.OLLAMA:
+        return {"api_url": config.get("ai_chat.ollama_api_url", "http://localhost:11434")}
+    return {}
+
+class HistoryView(Sequence):
+    """Read-only live view of a conversation history, returned without copying"""
+    
+    __slots__ = ("_messages",)
+    
+    def __init__(self, messages: List[Dict[str, Any]]):
+        self._messages = messages
+    
+    def __getitem__(self, index):
+        return self._messages[index]
+    
+    def __len__(self) -> int:
+        return len(self._messages)
+    
+    def __repr__(self) -> str:
+        return f"HistoryView({self._messages!r})"
+
+
 class AIChat:
     """Unified AI chat interface supporting multiple providers"""
     
-    def __init__(self, provider: str = None, model: str = None):
+    def __init__(self, provider: str = None, model: str = None, static_system_prompt: str = None):
         from ..config import config
         
         # Determine provider based on model name if not explicitly provided
         if not provider and model:
-            if model.startswith(("gpt", "o1")):
-                provider = "openai"
-            elif model.startswith("claude"):
-                provider = "claude"
-            elif model.startswith("gemini"):
-                provider = "gemini"
-            else:
-                provider = config.get("ai_chat.default_provider", "openai")
+            provider = next(
+                (value for prefix, value in _PROVIDER_BY_PREFIX.items() if model.startswith(prefix)),
+                None
+            )
         
-        self.provider = AIProvider(provider or config.get("ai_chat.default_provider", "openai"))
+        if isinstance(provider, AIProvider):
+            self.provider = provider
+        else:
+            self.provider = _lookup_provider(provider or config.get("ai_chat.default_provider", "openai"))
         self.model = model
+        # Sent ahead of every conversation; kept constant so providers can cache the prefix
+        self.static_system_prompt = static_system_prompt
         self.conversation_history: List[Dict[str, Any]] = []
+        # Provider-formatted history per message format, extended one turn at a time
+        self._history_cache: Dict[str, tuple] = {}
+        # Base64 image payloads keyed by (path, mtime_ns, size), least recently used evicted first
+        self._image_b64_cache: "OrderedDict[tuple, str]" = OrderedDict()
+        # Raw Gemini image parts keyed the same way, least recently used evicted first
+        self._gemini_image_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        # Exact-match response cache shared across chat instances
+        self._response_cache = get_response_cache()
+        # Optional similarity tier for text-only prompts
+        self._semantic_cache = get_semantic_cache()
         
         # Initialize client based on provider
         self.client = None
+        # Async clients are shared per event loop and credentials, created from this factory
+        self._async_client_key = None
+        self._async_client_factory = None
         self._init_client()
         
     def _init_client(self):
         """Initialize the appropriate AI client"""
         from ..config import config
         
+        credentials = _resolve_credentials(self.provider, config.version)
+        
         if self.provider == AIProvider.OPENAI:
             try:
-                from openai import OpenAI
-                # Check ai_chat key first, then fallback to vlm key, then environment
-                api_key = (config.get("ai_chat.openai_api_key") or 
-                          config.get("vlm.openai_api_key") or 
-                          os.getenv("OPENAI_API_KEY"))
+                from openai import AsyncOpenAI
+                api_key = credentials["api_key"]
                 if not api_key:
                     # For demo purposes, use a dummy client that shows helpful error messages
                     raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY environment variable or add 'vlm.openai_api_key' to ~/.snapmark2/config.json")
-                self.client = OpenAI(api_key=api_key)
+                self.client = get_openai_client(api_key)
+                self._async_client_key = ("openai", api_key)
+                self._async_client_factory = lambda: AsyncOpenAI(
+                    api_key=api_key, http_client=get_async_http_client()
+                )
             except ImportError:
                 raise ImportError("OpenAI package not installed")
                 
         elif self.provider == AIProvider.AZURE_OPENAI:
             try:
-                from openai import AzureOpenAI
-                # Check ai_chat keys first, then fallback to vlm keys, then environment
-                api_key = (config.get("ai_chat.azure_api_key") or 
-                          config.get("vlm.azure_api_key") or 
-                          os.getenv("AZURE_OPENAI_API_KEY"))
-                endpoint = (config.get("ai_chat.azure_endpoint") or 
-                           config.get("vlm.azure_endpoint") or 
-                           os.getenv("AZURE_OPENAI_ENDPOINT"))
+                from openai import AsyncAzureOpenAI
+                api_key = credentials["api_key"]
+                endpoint = credentials["endpoint"]
                 if not api_key or not endpoint:
                     raise ValueError("Azure OpenAI credentials not found")
-                self.client = AzureOpenAI(
+                api_version = credentials["api_version"]
+                self.client = get_azure_openai_client(api_key, endpoint, api_version)
+                self._async_client_key = ("azure_openai", api_key, endpoint, api_version)
+                self._async_client_factory = lambda: AsyncAzureOpenAI(
                     api_key=api_key,
                     azure_endpoint=endpoint,
-                    api_version=config.get("ai_chat.azure_api_version", config.get("vlm.azure_api_version", "2024-02-01"))
+                    api_version=api_version,
+                    http_client=get_async_http_client()
                 )
             except ImportError:
                 raise ImportError("OpenAI package not installed")
@@ -77,59 +208,341 @@ class AIChat:
         elif self.provider == AIProvider.CLAUDE:
             try:
                 import anthropic
-                api_key = config.get("ai_chat.claude_api_key") or os.getenv("ANTHROPIC_API_KEY")
+                api_key = credentials["api_key"]
                 if not api_key:
                     raise ValueError("Claude API key not found")
-                self.client = anthropic.Anthropic(api_key=api_key)
+                self.client = get_anthropic_client(api_key)
+                self._async_client_key = ("anthropic", api_key)
+                self._async_client_factory = lambda: anthropic.AsyncAnthropic(api_key=api_key)
             except ImportError:
                 raise ImportError("Anthropic package not installed")
                 
         elif self.provider == AIProvider.GEMINI:
             try:
                 import google.generativeai as genai
-                api_key = config.get("ai_chat.gemini_api_key") or os.getenv("GOOGLE_API_KEY")
+                api_key = credentials["api_key"]
                 if not api_key:
                     raise ValueError("Gemini API key not found")
                 genai.configure(api_key=api_key)
-                self.client = genai.GenerativeModel(self.model or 'gemini-1.5-pro')
+                model_kwargs = {}
+                if self.static_system_prompt:
+                    model_kwargs["system_instruction"] = self.static_system_prompt
+                self.client = genai.GenerativeModel(self.model or 'gemini-1.5-pro', **model_kwargs)
             except ImportError:
                 raise ImportError("Google GenerativeAI package not installed")
                 
         elif self.provider == AIProvider.OLLAMA:
             # Ollama uses HTTP API, no special client needed
-            self.api_url = config.get("ai_chat.ollama_api_url", "http://localhost:11434")
+            self.api_url = credentials["api_url"]
             
-    def send_message(self, message: str, image_path: Optional[str] = None) -> str:
-        """Send a message to the AI and get a response"""
+            def ollama_client():
+                import httpx
+                return httpx.AsyncClient(timeout=60)
+            self._async_client_key = ("ollama",)
+            self._async_client_factory = ollama_client
+    
+    def _get_async_client(self):
+        """Get the shared async client for the running event loop"""
+        # Async SDK clients hold connections bound to the loop that created them
+        # OpenAI/Azure clients share the loop's httpx client, which must not be closed with them
+        shared_http = self.provider in (AIProvider.OPENAI, AIProvider.AZURE_OPENAI)
+        return get_async_client(self._async_client_key, self._async_client_factory,
+                                owns_connections=not shared_http)
+            
+    def send_message(self, message: str, image_path: Optional[str] = None,
+                     extra_context: Optional[str] = None, cache_key: Optional[tuple] = None) -> str:
+        """Send a message to the AI and get a response
+        
+        extra_context is appended to this turn's prompt only and is not kept in the history.
+        cache_key, if given, identifies the request for the response cache in place of the
+        full prompt and history (e.g. a template id, a hash of its content and its parameters).
+        """
         try:
             # Add user message to history
-            user_msg = {"role": "user", "content": message}
-            if image_path:
-                user_msg["image_path"] = image_path
-            self.conversation_history.append(user_msg)
+            self._push_message("user", message, image_path)
             
-            # Get response based on provider
-            if self.provider == AIProvider.OPENAI:
-                response = self._send_openai(message, image_path)
-            elif self.provider == AIProvider.AZURE_OPENAI:
-                response = self._send_azure(message, image_path)
-            elif self.provider == AIProvider.CLAUDE:
-                response = self._send_claude(message, image_path)
-            elif self.provider == AIProvider.GEMINI:
-                response = self._send_gemini(message, image_path)
-            elif self.provider == AIProvider.OLLAMA:
-                response = self._send_ollama(message, image_path)
-            else:
-                response = f"Provider {self.provider} not implemented"
+            prompt = message + extra_context if extra_context else message
+            history = self.conversation_history[:-1]
+            key = self._cache_key(prompt, image_path, history, cache_key)
+            # Templated requests differ in their data, not their wording, so a close
+            # paraphrase is no evidence of the same answer
+            semantic = cache_key is None
+            response = self._cache_get(key, prompt, image_path, history, semantic)
+            if response is None:
+                response = self._dispatch(prompt, image_path)
+                self._cache_put(key, response, prompt, image_path, history, semantic)
                 
             # Add assistant response to history
-            self.conversation_history.append({"role": "assistant", "content": response})
+            self._push_message("assistant", response)
             
             return response
             
         except Exception as e:
             return f"Error: {str(e)}"
             
+    async def send_message_async(self, message: str, image_path: Optional[str] = None,
+                                 extra_context: Optional[str] = None) -> str:
+        """Send a message to the AI without blocking the event loop"""
+        try:
+            # Add user message to history
+            self._push_message("user", message, image_path)
+            
+            prompt = message + extra_context if extra_context else message
+            history = self.conversation_history[:-1]
+            key = self._cache_key(prompt, image_path, history)
+            response = await self._cache_get_async(key, prompt, image_path, history)
+            if response is None:
+                response = await self._dispatch_async(prompt, image_path, history)
+                await self._cache_put_async(key, response, prompt, image_path, history)
+            
+            # Add assistant response to history
+            self._push_message("assistant", response)
+            
+            return response
+            
+        except Exception as e:
+            return f"Error: {str(e)}"
+    
+    async def send_messages_batch(self, prompts: List[str], max_parallel: Optional[int] = None) -> List[str]:
+        """Send independent prompts concurrently, outside the conversation history
+        
+        At most max_parallel requests (ai_chat.max_parallel, default 10) are in flight at once.
+        """
+        from ..config import config
+        
+        semaphore = asyncio.Semaphore(max_parallel or config.get("ai_chat.max_parallel", 10))
+        
+        async def send_one(prompt: str) -> str:
+            # Batch prompts are generated from templates, so only exact matches are reused
+            key = self._cache_key(prompt, None, [])
+            response = await self._cache_get_async(key, prompt, None, [], semantic=False)
+            if response is not None:
+                return response
+            
+            for attempt in range(RETRY_ATTEMPTS):
+                try:
+                    async with semaphore:
+                        response = await self._dispatch_async(prompt, None, [])
+                    await self._cache_put_async(key, response, prompt, None, [], semantic=False)
+                    return response
+                except Exception as e:
+                    if attempt + 1 < RETRY_ATTEMPTS and _is_retryable(e):
+                        await asyncio.sleep(RETRY_BASE_DELAY * 2 ** attempt)
+                        continue
+                    return f"Error: {str(e)}"
+        
+        return await asyncio.gather(*(send_one(prompt) for prompt in prompts))
+    
+    def _cache_key(self, message: str, image_path: Optional[str],
+                   history: List[Dict[str, Any]], request_key: Optional[tuple] = None) -> Optional[str]:
+        """Key identifying a request, or None when caching is disabled"""
+        if self._response_cache is None:
+            return None
+        
+        if request_key is not None:
+            # Caller-supplied identity; the prompt and history are not hashed
+            return make_key(
+                provider=self.provider.value,
+                model=self.model,
+                system=self.static_system_prompt,
+                request=list(request_key),
+                max_tokens=MAX_TOKENS
+            )
+        
+        def fingerprint(path: Optional[str]):
+            # Images are identified by path, mtime and size so edited files miss the cache
+            if not path:
+                return None
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            return [path, st.st_mtime_ns, st.st_size]
+        
+        messages = [
+            [msg["role"], msg["content"], fingerprint(msg.get("image_path"))]
+            for msg in history
+        ]
+        messages.append(["user", message, fingerprint(image_path)])
+        return make_key(
+            provider=self.provider.value,
+            model=self.model,
+            system=self.static_system_prompt,
+            messages=messages,
+            max_tokens=MAX_TOKENS
+        )
+    
+    def _semantic_scope(self, image_path: Optional[str], history: List[Dict[str, Any]],
+                        semantic: bool = True) -> Optional[str]:
+        """Scope for similarity lookups; only stand-alone, free-form text prompts are eligible"""
+        if not semantic or self._semantic_cache is None or image_path or history:
+            return None
+        if self.static_system_prompt:
+            return f"{self.provider.value}:{self.model}:{make_key(system=self.static_system_prompt)}"
+        return f"{self.provider.value}:{self.model}"
+    
+    def _cache_get(self, key: Optional[str], message: str, image_path: Optional[str],
+                   history: List[Dict[str, Any]], semantic: bool = True) -> Optional[str]:
+        if key is None:
+            return None
+        response = self._response_cache.get(key)
+        if response is None:
+            scope = self._semantic_scope(image_path, history, semantic)
+            if scope is not None:
+                response = self._semantic_cache.get(scope, message)
+        return response
+    
+    def _cache_put(self, key: Optional[str], response: str, message: str,
+                   image_path: Optional[str], history: List[Dict[str, Any]], semantic: bool = True):
+        if key is None or not response or response.startswith(_ERROR_PREFIXES):
+            return
+        self._response_cache.put(key, response)
+        scope = self._semantic_scope(image_path, history, semantic)
+        if scope is not None:
+            self._semantic_cache.put(scope, message, response)
+    
+    def _cache_blocks(self, key: Optional[str], image_path: Optional[str],
+                      history: List[Dict[str, Any]], semantic: bool = True) -> bool:
+        """Whether a cache access does blocking work (embedding a prompt or SQLite I/O)"""
+        if key is None:
+            return False
+        return (bool(self._response_cache.db_path)
+                or self._semantic_scope(image_path, history, semantic) is not None)
+    
+    async def _cache_get_async(self, key: Optional[str], message: str, image_path: Optional[str],
+                               history: List[Dict[str, Any]], semantic: bool = True) -> Optional[str]:
+        # Keep the event loop free while the semantic or persistent tier is consulted
+        if self._cache_blocks(key, image_path, history, semantic):
+            return await asyncio.to_thread(self._cache_get, key, message, image_path, history, semantic)
+        return self._cache_get(key, message, image_path, history, semantic)
+    
+    async def _cache_put_async(self, key: Optional[str], response: str, message: str,
+                               image_path: Optional[str], history: List[Dict[str, Any]],
+                               semantic: bool = True):
+        if self._cache_blocks(key, image_path, history, semantic):
+            await asyncio.to_thread(self._cache_put, key, response, message, image_path, history, semantic)
+        else:
+            self._cache_put(key, response, message, image_path, history, semantic)
+    
+    def _dispatch(self, message: str, image_path: Optional[str]) -> str:
+        """Route a message to the provider's implementation"""
+        if self.provider == AIProvider.OPENAI:
+            return self._send_openai(message, image_path)
+        elif self.provider == AIProvider.AZURE_OPENAI:
+            return self._send_azure(message, image_path)
+        elif self.provider == AIProvider.CLAUDE:
+            return self._send_claude(message, image_path)
+        elif self.provider == AIProvider.GEMINI:
+            return self._send_gemini(message, image_path)
+        elif self.provider == AIProvider.OLLAMA:
+            return self._send_ollama(message, image_path)
+        return f"Provider {self.provider} not implemented"
+    
+    async def _dispatch_async(self, message: str, image_path: Optional[str], history: List[Dict[str, Any]]) -> str:
+        """Route a message to the provider's async implementation"""
+        if self.provider == AIProvider.OPENAI:
+            return await self._send_openai_async(message, image_path, history, "gpt-4o-mini")
+        elif self.provider == AIProvider.AZURE_OPENAI:
+            return await self._send_openai_async(message, image_path, history, "gpt-4")
+        elif self.provider == AIProvider.CLAUDE:
+            return await self._send_claude_async(message, image_path, history)
+        elif self.provider == AIProvider.GEMINI:
+            return await self._send_gemini_async(message, image_path)
+        elif self.provider == AIProvider.OLLAMA:
+            return await self._send_ollama_async(message, image_path)
+        return f"Provider {self.provider} not implemented"
+    
+    async def _send_openai_async(self, message: str, image_path: Optional[str],
+                                 history: List[Dict[str, Any]], default_model: str) -> str:
+        """Send message to OpenAI or Azure OpenAI with the async client"""
+        messages = self._prepare_openai_messages(message, image_path, history)
+        
+        response = await self._get_async_client().chat.completions.create(
+            model=self.model or default_model,
+            messages=messages,
+            max_tokens=MAX_TOKENS
+        )
+        
+        return response.choices[0].message.content
+    
+    async def _send_claude_async(self, message: str, image_path: Optional[str],
+                                 history: List[Dict[str, Any]]) -> str:
+        """Send message to Claude with the async client"""
+        response = await self._get_async_client().messages.create(
+            **self._claude_request(message, image_path, history)
+        )
+        
+        return response.content[0].text
+    
+    async def _send_gemini_async(self, message: str, image_path: Optional[str] = None) -> str:
+        """Send message to Gemini with the async API"""
+        parts = [message]
+        
+        if image_path and Path(image_path).exists():
+            parts.append(self._gemini_image_part(image_path))
+            
+        response = await self.client.generate_content_async(parts)
+        return response.text
+    
+    async def stream_message_async(self, message: str, image_path: Optional[str] = None,
+                                   extra_context: Optional[str] = None) -> AsyncIterator[str]:
+        """Send a message and yield the response as it arrives"""
+        self._push_message("user", message, image_path)
+        prompt = message + extra_context if extra_context else message
+        history = self.conversation_history[:-1]
+        
+        chunks = []
+        try:
+            if self.provider == AIProvider.OLLAMA:
+                async for token in self._send_ollama_stream(prompt, image_path):
+                    chunks.append(token)
+                    yield token
+            else:
+                # Other providers are returned in one piece
+                response = await self._dispatch_async(prompt, image_path, history)
+                chunks.append(response)
+                yield response
+        except Exception as e:
+            error = f"Error: {str(e)}"
+            chunks.append(error)
+            yield error
+        
+        # Add the assembled assistant response to history
+        self._push_message("assistant", "".join(chunks))
+    
+    async def _send_ollama_stream(self, message: str, image_path: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream tokens from Ollama as they are generated"""
+        payload = self._prepare_ollama_payload(message, image_path, stream=True)
+        
+        async with self._get_async_client().stream(
+            "POST", f"{self.api_url}/api/generate", json=payload
+        ) as response:
+            if response.status_code != 200:
+                yield f"Ollama error: {response.status_code}"
+                return
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+    
+    async def _send_ollama_async(self, message: str, image_path: Optional[str] = None) -> str:
+        """Send message to Ollama with an async HTTP client"""
+        payload = self._prepare_ollama_payload(message, image_path)
+        
+        response = await self._get_async_client().post(
+            f"{self.api_url}/api/generate",
+            json=payload
+        )
+        
+        if response.status_code == 200:
+            return response.json().get("response", "No response")
+        else:
+            return f"Ollama error: {response.status_code}"
+            
     def _send_openai(self, message: str, image_path: Optional[str] = None) -> str:
         """Send message to OpenAI"""
         messages = self._prepare_openai_messages(message, image_path)
@@ -137,7 +550,7 @@ class AIChat:
         response = self.client.chat.completions.create(
             model=self.model or "gpt-4o-mini",
             messages=messages,
-            max_tokens=2000
+            max_tokens=MAX_TOKENS
         )
         
         return response.choices[0].message.content
@@ -149,200 +562,270 @@ class AIChat:
         response = self.client.chat.completions.create(
             model=self.model or "gpt-4",
             messages=messages,
-            max_tokens=2000
+            max_tokens=MAX_TOKENS
         )
         
         return response.choices[0].message.content
         
     def _send_claude(self, message: str, image_path: Optional[str] = None) -> str:
         """Send message to Claude"""
-        messages = []
-        
-        # Convert history to Claude format
-        for msg in self.conversation_history[:-1]:  # Exclude the last user message we just added
-            if msg["role"] == "user":
-                content = msg["content"]
-                if "image_path" in msg and Path(msg["image_path"]).exists():
-                    # Claude expects base64 images
-                    with open(msg["image_path"], "rb") as f:
-                        image_data = base64.b64encode(f.read()).decode()
-                    messages.append({
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": content},
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": "image/png",
-                                    "data": image_data
-                                }
-                            }
-                        ]
-                    })
-                else:
-                    messages.append({"role": "user", "content": content})
-            else:
-                messages.append({"role": "assistant", "content": msg["content"]})
-                
-        # Add current message
-        if image_path and Path(image_path).exists():
-            with open(image_path, "rb") as f:
-                image_data = base64.b64encode(f.read()).decode()
-            messages.append({
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": message},
-                    {
-                        "type": "image",
-                        "source": {
-                            "type": "base64",
-                            "media_type": "image/png",
-                            "data": image_data
-                        }
-                    }
-                ]
-            })
-        else:
-            messages.append({"role": "user", "content": message})
-            
-        response = self.client.messages.create(
-            model=self.model or "claude-3-5-sonnet-20241022",
-            messages=messages,
-            max_tokens=2000
-        )
+        response = self.client.messages.create(**self._claude_request(message, image_path))
         
         return response.content[0].text
         
     def _send_gemini(self, message: str, image_path: Optional[str] = None) -> str:
         """Send message to Gemini"""
-        from PIL import Image
-        
         parts = [message]
         
         if image_path and Path(image_path).exists():
-            image = Image.open(image_path)
-            parts.append(image)
+            parts.append(self._gemini_image_part(image_path))
             
         response = self.client.generate_content(parts)
         return response.text
         
     def _send_ollama(self, message: str, image_path: Optional[str] = None) -> str:
         """Send message to Ollama"""
-        import requests
+        payload = self._prepare_ollama_payload(message, image_path, stream=True)
+            
+        # Stream the generation and assemble tokens as they arrive
+        with get_ollama_session().post(
+            f"{self.api_url}/api/generate",
+            json=payload,
+            stream=True,
+            timeout=60
+        ) as response:
+            if response.status_code != 200:
+                return f"Ollama error: {response.status_code}"
+            
+            chunks = []
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                chunks.append(chunk.get("response", ""))
+                if chunk.get("done"):
+                    break
         
+        return "".join(chunks) or "No response"
+            
+    def _encode_image(self, image_path: str) -> str:
+        """Base64-encode an image, reusing the result while the file is unchanged"""
+        st = os.stat(image_path)
+        key = (image_path, st.st_mtime_ns, st.st_size)
+        image_data = self._image_b64_cache.get(key)
+        if image_data is None:
+            image_data = b64encode(Path(image_path).read_bytes()).decode()
+            self._image_b64_cache[key] = image_data
+            if len(self._image_b64_cache) > IMAGE_B64_CACHE_SIZE:
+                self._image_b64_cache.popitem(last=False)
+        else:
+            self._image_b64_cache.move_to_end(key)
+        return image_data
+    
+    def _gemini_image_part(self, image_path: str) -> Dict[str, Any]:
+        """Gemini inline image part with the file's raw bytes, skipping a PIL decode"""
+        st = os.stat(image_path)
+        key = (image_path, st.st_mtime_ns, st.st_size)
+        part = self._gemini_image_cache.get(key)
+        if part is None:
+            part = {"mime_type": _image_mime_type(image_path), "data": Path(image_path).read_bytes()}
+            self._gemini_image_cache[key] = part
+            if len(self._gemini_image_cache) > GEMINI_IMAGE_CACHE_SIZE:
+                self._gemini_image_cache.popitem(last=False)
+        else:
+            self._gemini_image_cache.move_to_end(key)
+        return part
+    
+    def _openai_user_message(self, text: str, image_path: Optional[str] = None) -> Dict:
+        """Build an OpenAI/Azure user message, with the image inlined if it exists"""
+        if not image_path or not Path(image_path).exists():
+            return {"role": "user", "content": text}
+        return {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": text},
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:{_image_mime_type(image_path)};base64,{self._encode_image(image_path)}"
+                    }
+                }
+            ]
+        }
+    
+    def _claude_user_message(self, text: str, image_path: Optional[str] = None) -> Dict:
+        """Build a Claude user message, with the image inlined if it exists"""
+        if not image_path or not Path(image_path).exists():
+            return {"role": "user", "content": text}
+        return {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": text},
+                {
+                    "type": "image",
+                    "source": {
+                        "type": "base64",
+                        "media_type": _image_mime_type(image_path),
+                        "data": self._encode_image(image_path)
+                    }
+                }
+            ]
+        }
+    
+    def _prepare_ollama_payload(self, message: str, image_path: Optional[str] = None,
+                                stream: bool = False) -> Dict[str, Any]:
+        """Prepare the Ollama generate request payload"""
         payload = {
             "model": self.model or "llama2",
             "prompt": message,
-            "stream": False
+            "stream": stream
         }
+        if self.static_system_prompt:
+            payload["system"] = self.static_system_prompt
         
         if image_path and Path(image_path).exists():
-            with open(image_path, "rb") as f:
-                image_data = base64.b64encode(f.read()).decode()
-            payload["images"] = [image_data]
-            
-        response = requests.post(
-            f"{self.api_url}/api/generate",
-            json=payload,
-            timeout=60
-        )
+            payload["images"] = [self._encode_image(image_path)]
         
-        if response.status_code == 200:
-            return response.json().get("response", "No response")
-        else:
-            return f"Ollama error: {response.status_code}"
-            
-    def _prepare_openai_messages(self, message: str, image_path: Optional[str] = None) -> List[Dict]:
-        """Prepare messages for OpenAI/Azure format"""
-        messages = []
+        return payload
+    
+    def _push_message(self, role: str, content: str, image_path: Optional[str] = None):
+        """Append a turn to the history and to the provider-formatted copies in use"""
+        msg = {"role": role, "content": content}
+        if image_path:
+            msg["image_path"] = image_path
+        self.conversation_history.append(msg)
         
-        # Add conversation history
-        for msg in self.conversation_history[:-1]:  # Exclude the last user message
+        for fmt in self._history_cache:
+            self._sync_history_cache(fmt, len(self.conversation_history))
+    
+    def _sync_history_cache(self, fmt: str, count: int) -> List[Dict]:
+        """Provider-formatted copy of the first count history turns
+        
+        Turns are converted once and never rebuilt, so the request prefix stays
+        byte-identical between turns and provider-side prompt caching keeps hitting.
+        """
+        history = self.conversation_history
+        source, converted = self._history_cache.setdefault(fmt, ([], []))
+        # Start over if the history was cleared or rewritten behind our back
+        if len(source) > len(history) or (source and history[len(source) - 1] is not source[-1]):
+            source.clear()
+            converted.clear()
+        
+        build_user = self._openai_user_message if fmt == "openai" else self._claude_user_message
+        for msg in history[len(source):count]:
+            source.append(msg)
             if msg["role"] == "user":
-                content = msg["content"]
-                if "image_path" in msg and Path(msg["image_path"]).exists():
-                    with open(msg["image_path"], "rb") as f:
-                        image_data = base64.b64encode(f.read()).decode()
-                    messages.append({
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": content},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{image_data}"
-                                }
-                            }
-                        ]
-                    })
-                else:
-                    messages.append({"role": "user", "content": content})
+                converted.append(build_user(msg["content"], msg.get("image_path")))
             else:
-                messages.append({"role": "assistant", "content": msg["content"]})
+                converted.append({"role": "assistant", "content": msg["content"]})
+        return converted[:count]
+    
+    def _history_messages(self, fmt: str, history: List[Dict[str, Any]]) -> List[Dict]:
+        """Provider-formatted history for a request"""
+        if not history:
+            return []
+        # Histories passed around are always a prefix of conversation_history
+        return self._sync_history_cache(fmt, len(history))
+    
+    def _prepare_claude_messages(self, message: str, image_path: Optional[str] = None,
+                                 history: Optional[List[Dict[str, Any]]] = None) -> List[Dict]:
+        """Prepare messages for Claude format"""
+        if history is None:
+            history = self.conversation_history[:-1]  # Exclude the last user message we just added
+        
+        messages = self._history_messages("claude", history)
+        if messages:
+            # Cache breakpoint on the last committed turn; only the new message follows it
+            last = messages[-1]
+            content = last["content"]
+            blocks = [{"type": "text", "text": content}] if isinstance(content, str) else list(content)
+            blocks[-1] = {**blocks[-1], "cache_control": {"type": "ephemeral"}}
+            messages[-1] = {**last, "content": blocks}
                 
         # Add current message
-        if image_path and Path(image_path).exists():
-            with open(image_path, "rb") as f:
-                image_data = base64.b64encode(f.read()).decode()
-            messages.append({
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": message},
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/png;base64,{image_data}"
-                        }
-                    }
-                ]
-            })
-        else:
-            messages.append({"role": "user", "content": message})
-            
+        messages.append(self._claude_user_message(message, image_path))
+        return messages
+    
+    def _claude_request(self, message: str, image_path: Optional[str] = None,
+                        history: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Keyword arguments for a Claude messages.create call"""
+        request = {
+            "model": self.model or "claude-3-5-sonnet-20241022",
+            "messages": self._prepare_claude_messages(message, image_path, history),
+            "max_tokens": MAX_TOKENS
+        }
+        if self.static_system_prompt:
+            request["system"] = [{
+                "type": "text",
+                "text": self.static_system_prompt,
+                "cache_control": {"type": "ephemeral"}
+            }]
+        return request
+    
+    def _prepare_openai_messages(self, message: str, image_path: Optional[str] = None,
+                                 history: Optional[List[Dict[str, Any]]] = None) -> List[Dict]:
+        """Prepare messages for OpenAI/Azure format"""
+        if history is None:
+            history = self.conversation_history[:-1]  # Exclude the last user message
+        
+        # Stable prefix first: system prompt, then committed turns in order
+        messages = []
+        if self.static_system_prompt:
+            messages.append({"role": "system", "content": self.static_system_prompt})
+        messages.extend(self._history_messages("openai", history))
+                
+        # Add current message
+        messages.append(self._openai_user_message(message, image_path))
         return messages
         
     def clear_history(self):
         """Clear conversation history"""
         self.conversation_history.clear()
+        self._history_cache.clear()
+        self._image_b64_cache.clear()
+        self._gemini_image_cache.clear()
         
-    def get_history(self) -> List[Dict[str, Any]]:
-        """Get conversation history"""
-        return self.conversation_history.copy()
+    def get_history(self) -> Sequence:
+        """Get a read-only view of the conversation history"""
+        return HistoryView(self.conversation_history)
 
 
 class AIChatProcessor:
     """Async wrapper for AI chat to work with Streamlit"""
     
-    def __init__(self, provider: str = None, model: str = None):
+    def __init__(self, provider: str = None, model: str = None, static_system_prompt: str = None):
         try:
-            self.ai_chat = AIChat(provider, model)
+            self.ai_chat = AIChat(provider, model, static_system_prompt)
             self.initialized = True
         except Exception as e:
             self.ai_chat = None
             self.initialized = False
             self.error = str(e)
         
-    async def process_message(self, message: str, context: Dict[str, Any] = None) -> str:
-        """Process message with context (async for Streamlit compatibility)"""
+    async def process_message(self, message: str, context: Dict[str, Any] = None) -> Union[str, AsyncIterator[str]]:
+        """Process message with context (async for Streamlit compatibility)
+        
+        Returns an async iterator of response chunks instead of a string when context["stream"] is set.
+        """
         if not self.initialized:
             return f"AI chat initialization failed: {getattr(self, 'error', 'Unknown error')}"
         
         # Extract image path from context if available
         image_path = context.get('image_path') if context else None
         
-        # Add context information to the message if available
+        # Screenshot context goes into this turn's prompt only, never into the history,
+        # so earlier turns stay identical and the provider's prompt cache keeps hitting
+        extra_context = ""
         if context:
-            enhanced_message = message
             if context.get('ocr_text'):
-                enhanced_message += f"\n\nOCR Text from image: {context['ocr_text']}"
+                extra_context += f"\n\nOCR Text from image: {context['ocr_text']}"
             if context.get('vlm_description'):
-                enhanced_message += f"\n\nImage description: {context['vlm_description']}"
-        else:
-            enhanced_message = message
+                extra_context += f"\n\nImage description: {context['vlm_description']}"
             
-        # Use the synchronous AI chat in a way that works with async
-        response = self.ai_chat.send_message(enhanced_message, image_path)
+        if context and context.get('stream'):
+            return self.ai_chat.stream_message_async(message, image_path, extra_context)
+        
+        response = await self.ai_chat.send_message_async(message, image_path, extra_context)
         return response
         
     def clear_history(self):
@@ -350,8 +833,8 @@ class AIChatProcessor:
         if self.initialized:
             self.ai_chat.clear_history()
         
-    def get_history(self) -> List[Dict[str, Any]]:
-        """Get conversation history"""
+    def get_history(self) -> Sequence:
+        """Get a read-only view of the conversation history"""
         if self.initialized:
             return self.ai_chat.get_history()
-        return []
\ No newline at end of file
+        return ()
\ No newline at end of file
@@ -1,9 +1,57 @@
 import os
+import hashlib
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 from .ai_chat import AIChat
 
+# Prompt templates. Bump the version suffix whenever the wording changes, since the id
+# (not the prompt text) is what cached responses are keyed on.
+CUSTOM_SUMMARY_TMPL_V1 = """
+{prompt}
+
+以下是過去 {days} 天的截圖筆記內容：
+
+{content}
+"""
+
+DAILY_SUMMARY_TMPL_V1 = """
+Please analyze the following screenshot notes from {date} and create a concise summary:
+
+{content}
+
+Please provide:
+1. A brief overview of the main activities/topics captured
+2. Key information or insights from the screenshots
+3. Any patterns or recurring themes
+4. Important action items or follow-ups mentioned
+
+Keep the summary concise but informative, focusing on the most relevant content.
+"""
+
+NOTE_SUMMARY_TMPL_V1 = """
+Please summarize the following OCR text extracted from a screenshot:
+
+OCR Text:
+{content}
+
+{context}
+
+Provide a brief, clear summary of the main points and any actionable information.
+"""
+
+ACTION_ITEMS_TMPL_V1 = """
+Extract any action items, tasks, or to-dos from the following text:
+
+{content}
+
+Return only the action items as a simple list, one item per line. If no action items are found, return "No action items found."
+"""
+
+
+def _content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
 
 class AISummaryGenerator:
     def __init__(self, api_key: Optional[str] = None):
@@ -31,16 +79,11 @@ class AISummaryGenerator:
             
         combined_content = "\n\n---\n\n".join(notes)
         
-        full_prompt = f"""
-{prompt}
-
-以下是過去 {days} 天的截圖筆記內容：
-
-{combined_content}
-"""
+        full_prompt = CUSTOM_SUMMARY_TMPL_V1.format(prompt=prompt, days=days, content=combined_content)
+        cache_key = ("custom_summary_v1", _content_hash(combined_content), prompt, days)
         
         try:
-            response = self.ai_chat.send_message(full_prompt)
+            response = self.ai_chat.send_message(full_prompt, cache_key=cache_key)
             return response
         except Exception as e:
             return f"生成摘要時發生錯誤: {str(e)}"
@@ -57,26 +100,16 @@ class AISummaryGenerator:
             date = datetime.now()
         
         combined_content = "\n\n".join(notes)
+        date_str = date.strftime('%Y-%m-%d')
         
-        prompt = f"""
-Please analyze the following screenshot notes from {date.strftime('%Y-%m-%d')} and create a concise summary:
-
-{combined_content}
-
-Please provide:
-1. A brief overview of the main activities/topics captured
-2. Key information or insights from the screenshots
-3. Any patterns or recurring themes
-4. Important action items or follow-ups mentioned
-
-Keep the summary concise but informative, focusing on the most relevant content.
-"""
+        prompt = DAILY_SUMMARY_TMPL_V1.format(date=date_str, content=combined_content)
+        cache_key = ("daily_summary_v1", _content_hash(combined_content), date_str)
         
         if not self.ai_chat:
             self.ai_chat = AIChat(provider="openai", model="gpt-3.5-turbo")
         
         try:
-            response = self.ai_chat.send_message(prompt)
+            response = self.ai_chat.send_message(prompt, cache_key=cache_key)
             return response
         except Exception as e:
             return f"Error generating summary: {str(e)}"
@@ -85,40 +118,52 @@ Keep the summary concise but informative, focusing on the most relevant content.
         if not ocr_text.strip():
             return "No text content available for summary."
         
-        prompt = f"""
-Please summarize the following OCR text extracted from a screenshot:
-
-OCR Text:
-{ocr_text}
-
-{f"Context: {context}" if context else ""}
-
-Provide a brief, clear summary of the main points and any actionable information.
-"""
+        prompt = self._note_summary_prompt(ocr_text, context)
+        cache_key = ("note_summary_v1", _content_hash(ocr_text), context)
         
         if not self.ai_chat:
             self.ai_chat = AIChat(provider="openai", model="gpt-3.5-turbo")
         
         try:
-            response = self.ai_chat.send_message(prompt)
+            response = self.ai_chat.send_message(prompt, cache_key=cache_key)
             return response
         except Exception as e:
             return f"Error generating summary: {str(e)}"
     
+    async def generate_note_summaries(self, ocr_texts: List[str]) -> List[str]:
+        """Summarize many notes concurrently, in the order given"""
+        if not self.ai_chat:
+            self.ai_chat = AIChat(provider="openai", model="gpt-3.5-turbo")
+        
+        summaries = ["No text content available for summary."] * len(ocr_texts)
+        pending = [i for i, text in enumerate(ocr_texts) if text.strip()]
+        
+        try:
+            responses = await self.ai_chat.send_messages_batch(
+                [self._note_summary_prompt(ocr_texts[i]) for i in pending]
+            )
+        except Exception as e:
+            responses = [f"Error generating summary: {str(e)}"] * len(pending)
+        
+        for i, response in zip(pending, responses):
+            summaries[i] = response
+        return summaries
+    
+    def _note_summary_prompt(self, ocr_text: str, context: str = "") -> str:
+        return NOTE_SUMMARY_TMPL_V1.format(
+            content=ocr_text,
+            context=f"Context: {context}" if context else ""
+        )
+    
     def extract_action_items(self, text_content: str) -> List[str]:
-        prompt = f"""
-Extract any action items, tasks, or to-dos from the following text:
-
-{text_content}
-
-Return only the action items as a simple list, one item per line. If no action items are found, return "No action items found."
-"""
+        prompt = ACTION_ITEMS_TMPL_V1.format(content=text_content)
+        cache_key = ("action_items_v1", _content_hash(text_content))
         
         if not self.ai_chat:
             self.ai_chat = AIChat(provider="openai", model="gpt-3.5-turbo")
         
         try:
-            response = self.ai_chat.send_message(prompt)
+            response = self.ai_chat.send_message(prompt, cache_key=cache_key)
             
             if "No action items found" in response:
                 return []
@@ -1,24 +1,53 @@
 from pynput import keyboard
 from pynput.keyboard import Key, KeyCode, Listener
-from typing import Callable, Optional
+from typing import Any, Callable, Dict, Optional
 import threading
 
+# Bit index per key, assigned on first sight; a hotkey is the OR of its keys' bits.
+# Python ints are unbounded, so more than 64 distinct keys still works (just not in one machine word).
+_KEY_BIT: Dict[Any, int] = {}
+_key_bit_lock = threading.Lock()
+
+
+def _bit(key) -> int:
+    bit = _KEY_BIT.get(key)
+    if bit is None:
+        with _key_bit_lock:
+            bit = _KEY_BIT.setdefault(key, 1 << len(_KEY_BIT))
+    return bit
+
 
 class HotkeyManager:
     def __init__(self):
         self.callbacks = {}
         self.active = False
         self.listener = None
-        self.current_keys = set()
+        self.pressed_mask = 0
+        # Masks of hotkeys that already fired and are still held down
+        self._fired = set()
+        # (required_mask, callback) pairs, rebuilt on (un)registration for fast iteration
+        self._cbs_list = ()
     
     def register_hotkey(self, hotkey: str, callback: Callable, suppress: bool = True):
         # Convert hotkey string to key combination
         keys = self._parse_hotkey(hotkey)
+        mask = 0
+        for key in keys:
+            mask |= _bit(key)
         self.callbacks[hotkey] = {
             'keys': keys,
+            'mask': mask,
             'callback': callback,
             'suppress': suppress
         }
+        self._rebuild_callbacks()
+    
+    def _rebuild_callbacks(self):
+        # Skip empty masks (unparseable hotkeys), which would match every keystroke
+        self._cbs_list = tuple(
+            (config['mask'], config['callback'])
+            for config in self.callbacks.values() if config['mask']
+        )
     
     def _parse_hotkey(self, hotkey: str) -> set:
         keys = set()
@@ -59,23 +88,24 @@ class HotkeyManager:
     def unregister_hotkey(self, hotkey: str):
         if hotkey in self.callbacks:
             del self.callbacks[hotkey]
+            self._rebuild_callbacks()
     
     def _on_press(self, key):
-        self.current_keys.add(key)
+        pressed = self.pressed_mask = self.pressed_mask | _bit(key)
         
-        # Check if any registered hotkey matches
-        for hotkey, config in self.callbacks.items():
-            if config['keys'].issubset(self.current_keys):
+        # Fire hotkeys that just became satisfied; OS key repeat while held does not refire
+        for mask, callback in self._cbs_list:
+            if (pressed & mask) == mask and mask not in self._fired:
+                self._fired.add(mask)
                 try:
-                    config['callback']()
+                    callback()
                 except Exception as e:
                     print(f"Error executing hotkey callback: {e}")
     
     def _on_release(self, key):
-        try:
-            self.current_keys.discard(key)
-        except KeyError:
-            pass
+        pressed = self.pressed_mask = self.pressed_mask & ~_bit(key)
+        if self._fired:
+            self._fired = {mask for mask in self._fired if (pressed & mask) == mask}
     
     def start_listening(self):
         if not self.active:
@@ -88,7 +118,8 @@ class HotkeyManager:
         if self.listener:
             self.listener.stop()
             self.listener = None
-        self.current_keys.clear()
+        self.pressed_mask = 0
+        self._fired.clear()
     
     def is_active(self) -> bool:
         return self.active
\ No newline at end of file
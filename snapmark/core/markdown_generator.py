@@ -5,6 +5,11 @@ from typing import Optional, Dict, Any
 
 
 class MarkdownGenerator:
+    # Fixed sections of a note; variable sections are appended between them
+    HEADER_TEMPLATE = "# {title}\n\n**Created:** {created}\n**Image:** {image}\n"
+    SCREENSHOT_TEMPLATE = "\n## Screenshot\n\n![Screenshot]({image})\n"
+    NOTES_SECTION = "\n## Notes\n\n<!-- Add your notes here -->\n"
+    
     def __init__(self, output_dir: str = "SnapMarkData"):
         self.output_dir = Path(output_dir)
     
@@ -36,8 +41,7 @@ class MarkdownGenerator:
             metadata=metadata or {}
         )
         
-        with open(md_filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+        md_filepath.write_text(content, encoding='utf-8')
         
         return str(md_filepath)
     
@@ -51,43 +55,49 @@ class MarkdownGenerator:
         tags: list,
         metadata: Dict[str, Any]
     ) -> str:
-        content = f"""# {title}
-
-**Created:** {timestamp.strftime('%Y-%m-%d %H:%M:%S')}
-**Image:** {image_path.name}
-"""
+        parts = [self.HEADER_TEMPLATE.format_map({
+            'title': title,
+            'created': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            'image': image_path.name
+        })]
         
         if tags:
             tag_str = " ".join([f"#{tag}" for tag in tags])
-            content += f"**Tags:** {tag_str}\n"
+            parts.append(f"**Tags:** {tag_str}\n")
         
         if metadata:
-            content += "\n## Metadata\n\n"
-            for key, value in metadata.items():
-                content += f"- **{key.title()}:** {value}\n"
+            parts.append("\n## Metadata\n\n")
+            parts.extend(f"- **{key.title()}:** {value}\n" for key, value in metadata.items())
         
-        content += f"\n## Screenshot\n\n![Screenshot]({image_path.name})\n"
+        parts.append(self.SCREENSHOT_TEMPLATE.format_map({'image': image_path.name}))
         
         if vlm_description and vlm_description.strip():
-            content += f"\n## Image Description (VLM)\n\n{vlm_description}\n"
+            parts.append(f"\n## Image Description (VLM)\n\n{vlm_description}\n")
         
         if ocr_text and ocr_text.strip():
-            content += f"\n## OCR Text\n\n```\n{ocr_text}\n```\n"
+            parts.append(f"\n## OCR Text\n\n```\n{ocr_text}\n```\n")
         
-        content += "\n## Notes\n\n<!-- Add your notes here -->\n"
+        parts.append(self.NOTES_SECTION)
         
-        return content
+        return "".join(parts)
     
     def update_note_with_summary(self, md_filepath: str, summary: str):
-        with open(md_filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        if "## AI Summary" not in content:
-            summary_section = f"\n## AI Summary\n\n{summary}\n"
-            content = content.replace("## Notes", f"{summary_section}\n## Notes")
-            
-            with open(md_filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
+        md_filepath = Path(md_filepath)
+        content = md_filepath.read_text(encoding='utf-8')
+        
+        if "## AI Summary" in content:
+            return
+        
+        # The generated Notes section is the last one, after any OCR text that may contain the heading
+        head, sep, tail = content.rpartition("## Notes")
+        if not sep:
+            return
+        content = f"{head}\n## AI Summary\n\n{summary}\n\n{sep}{tail}"
+        
+        # Write to a temp file and rename so a crash never leaves a truncated note
+        tmp_filepath = md_filepath.with_suffix(".md.tmp")
+        tmp_filepath.write_text(content, encoding='utf-8')
+        os.replace(tmp_filepath, md_filepath)
     
     def get_daily_notes(self, date: Optional[datetime] = None) -> list:
         if not date:
@@ -98,4 +108,9 @@ class MarkdownGenerator:
         if not date_path.exists():
             return []
         
-        return list(date_path.glob("*.md"))
\ No newline at end of file
+        # scandir reuses the directory entries' cached type instead of stat-ing each path
+        with os.scandir(date_path) as entries:
+            return [
+                Path(entry.path) for entry in entries
+                if entry.name.endswith(".md") and entry.is_file(follow_symlinks=False)
+            ]
\ No newline at end of file
@@ -3,9 +3,13 @@ Custom MCP Agent wrapper that filters large image data from intermediate steps.
 This prevents token limit errors when processing screenshots with mcp-use.
 """
 
-import re
+import os
+import string
+import asyncio
 import logging
-from typing import Any, AsyncGenerator, TypeVar, Dict, List, Tuple
+from bisect import bisect_right
+from collections.abc import Sequence
+from typing import Any, AsyncGenerator, Iterable, Optional, Set, TypeVar, Dict, List, Tuple
 from langchain.schema import BaseMessage, AgentAction
 from langchain.agents import AgentExecutor
 from mcp_use.agents.mcpagent import MCPAgent
@@ -16,34 +20,184 @@ T = TypeVar("T", bound=BaseModel)
 
 logger = logging.getLogger(__name__)
 
+# Base64 PNG and JPEG headers, data-URL image prefix, and the run length of base64
+# characters treated as embedded data
+_PNG_MAGIC = "iVBORw0KGg"
+_JPEG_MAGIC = "/9j/"
+_DATA_URL_IMAGE = "data:image/"
+_MIN_BASE64_RUN = 500
+
+# Text substituted for filtered observations in the steps shown to the LLM; the executor's
+# own step list (and so return_intermediate_steps) keeps the full content
+_PLACEHOLDER_TMPL = "[Large image data filtered - {} characters. Successfully read image at step {}]"
+_TRUNC_TMPL = "\n[... truncated {} characters of data. Full content preserved for final processing]"
+
+# Observations at least this long are filtered on worker threads instead of the event loop;
+# those up to BATCH_FILTER_MAX_LENGTH share a single base64 scan
+THREAD_FILTER_MIN_LENGTH = 5000
+BATCH_FILTER_MAX_LENGTH = 50 * 1024
+
+# Byte lookup table: base64 alphabet -> 'A', everything else -> space
+_BASE64_CHARS = (string.ascii_letters + string.digits + "+/").encode()
+_BASE64_TABLE = bytes(0x41 if i in _BASE64_CHARS else 0x20 for i in range(256))
+_BASE64_RUN_NEEDLE = b"A" * _MIN_BASE64_RUN
+
+
+# Tool name/description keywords of tools that may return images or arbitrary file or
+# resource content. Their observations are always scanned; the others are assumed to
+# return plain text and are passed through unscanned.
+_SCANNED_TOOL_KEYWORDS = (
+    "image", "screenshot", "screen", "png", "jpeg", "jpg", "picture", "photo",
+    "file", "resource", "download", "fetch", "blob", "base64", "binary"
+)
+
+
+def classify_text_tools(tools: Iterable[Any]) -> Set[str]:
+    """Names of tools that, from their names and descriptions, only return plain text.
+    
+    A tool name only ever skips the scan: image tools such as browser snapshots or OCR
+    often return large text, so what gets filtered is always decided by content.
+    """
+    text_tools = set()
+    for tool in tools:
+        name = getattr(tool, "name", "")
+        haystack = f"{name} {getattr(tool, 'description', '') or ''}".lower()
+        if not any(keyword in haystack for keyword in _SCANNED_TOOL_KEYWORDS):
+            text_tools.add(name)
+    return text_tools
+
+
+def _is_encoded_image(text: str) -> bool:
+    """Whether text is a data URL or starts with base64 PNG/JPEG data (find with bounds avoids slicing)."""
+    return (text.startswith(_DATA_URL_IMAGE) or text.find(_PNG_MAGIC, 0, 100) != -1
+            or text.find(_JPEG_MAGIC, 0, 100) != -1)
+
+
+def _has_base64_run(text: str) -> bool:
+    """Whether text contains a run of at least _MIN_BASE64_RUN base64 characters.
+    
+    Non-latin-1 characters become '?' so they still break runs. The substring search
+    skips ahead on every non-base64 byte, so whitespace-rich prose is rejected after
+    touching only a fraction of the bytes, without building a list of tokens.
+    """
+    return _BASE64_RUN_NEEDLE in text.encode('latin-1', errors='replace').translate(_BASE64_TABLE)
+
+
+def _texts_with_base64_runs(texts: List[str]) -> Set[int]:
+    """Indices of texts containing a base64 run, found with one scan over all of them."""
+    # A newline between texts breaks any run, so matches never span two texts
+    data = "\n".join(texts).encode('latin-1', errors='replace').translate(_BASE64_TABLE)
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + 1
+    
+    found = set()
+    pos = data.find(_BASE64_RUN_NEEDLE)
+    while pos != -1:
+        index = bisect_right(starts, pos) - 1
+        found.add(index)
+        # Resume after the text that matched
+        next_start = starts[index + 1] if index + 1 < len(starts) else len(data)
+        pos = data.find(_BASE64_RUN_NEEDLE, next_start)
+    return found
+
+
+class _FilteredStepsView(Sequence):
+    """Read-only list-like view of the filtered steps of the current run."""
+    
+    __slots__ = ("_cache", "_length")
+    
+    def __init__(self, cache: Dict[int, Tuple[AgentAction, str]], length: int):
+        self._cache = cache
+        self._length = length
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._cache[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("step index out of range")
+        return self._cache[index]
+    
+    def __len__(self) -> int:
+        return self._length
+
 
 class FilteredAgentExecutor(AgentExecutor):
     """Custom AgentExecutor that filters large data from intermediate steps."""
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, text_tool_names: Optional[Set[str]] = None, **kwargs):
         super().__init__(*args, **kwargs)
-        self._full_observations = {}
+        # Observations from text tools are passed through without scanning
+        self._text_tool_names = set(text_tool_names or ())
+        # Step index -> (action, filtered observation), so each step is filtered once per run
+        self._filtered_cache: Dict[int, Tuple[AgentAction, str]] = {}
+        # Number of steps already filtered, and whether any of them changed
+        self._filtered_count = 0
+        self._any_filtered = False
+        # (length, step_num) -> placeholder text, shared across iterations
+        self._placeholder_cache: Dict[Tuple[int, int], str] = {}
+        
+    def _filter_large_data(self, observation: str, step_num: int, length: int = None,
+                           action: Optional[AgentAction] = None, has_base64: Optional[bool] = None) -> str:
+        """Filter large base64 data from an observation for the LLM prompt.
+        
+        has_base64 is the result of a base64 scan already done by the caller, if any.
+        """
+        if action is not None and action.tool in self._text_tool_names:
+            return observation
+        
+        if length is None:
+            length = len(observation)
         
-    def _filter_large_data(self, observation: str, step_num: int) -> str:
-        """Filter large base64 data from observations while preserving references."""
         # Check if this looks like base64 image data
-        if len(observation) > 1000 and "iVBORw0KGg" in observation[:100]:
-            # Store the full observation
-            self._full_observations[step_num] = observation
-            # Return a placeholder
-            return f"[Large image data filtered - {len(observation)} characters. Successfully read image at step {step_num}]"
+        if length > 1000 and _is_encoded_image(observation):
+            return self._image_placeholder(observation, step_num, length)
         
         # Also check for base64 patterns in general
-        base64_pattern = r'[A-Za-z0-9+/]{500,}={0,2}'
-        if len(observation) > 5000 and re.search(base64_pattern, observation):
-            # Store the full observation
-            self._full_observations[step_num] = observation
+        if length > 5000 and (has_base64 if has_base64 is not None else _has_base64_run(observation)):
             # Return a truncated version
-            truncated = observation[:200] + f"\n[... truncated {len(observation) - 200} characters of data. Full content preserved for final processing]"
+            truncated = observation[:200] + _TRUNC_TMPL.format(length - 200)
             return truncated
             
         return observation
     
+    def _image_placeholder(self, observation: str, step_num: int, length: int) -> str:
+        """Placeholder text for a filtered image observation."""
+        key = (length, step_num)
+        placeholder = self._placeholder_cache.get(key)
+        if placeholder is None:
+            placeholder = self._placeholder_cache[key] = _PLACEHOLDER_TMPL.format(length, step_num)
+        return placeholder
+    
+    def _filter_batch(self, steps: List[Tuple[int, AgentAction, str]]) -> List[str]:
+        """Filter several observations, sharing one base64 scan between them."""
+        flagged = _texts_with_base64_runs([text for _, _, text in steps])
+        return [
+            self._filter_large_data(text, i, len(text), action, has_base64=n in flagged)
+            for n, (i, action, text) in enumerate(steps)
+        ]
+    
+    def _reset_run_state(self):
+        """Drop filtered steps left over from the previous run."""
+        self._filtered_cache.clear()
+        self._filtered_count = 0
+        self._any_filtered = False
+        self._placeholder_cache.clear()
+    
+    def _call(self, inputs: Dict[str, Any], run_manager=None) -> Dict[str, Any]:
+        """Start each agent run with empty per-run state."""
+        self._reset_run_state()
+        return super()._call(inputs, run_manager=run_manager)
+    
+    async def _acall(self, inputs: Dict[str, Any], run_manager=None) -> Dict[str, Any]:
+        """Start each agent run with empty per-run state."""
+        self._reset_run_state()
+        return await super()._acall(inputs, run_manager=run_manager)
+    
     async def _atake_next_step(
         self,
         name_to_tool_map: Dict[str, Any],
@@ -54,14 +208,66 @@ class FilteredAgentExecutor(AgentExecutor):
     ) -> Any:
         """Override to filter intermediate steps before passing to LLM."""
         # Create filtered intermediate steps
-        filtered_steps = []
-        for i, (action, observation) in enumerate(intermediate_steps):
-            filtered_obs = self._filter_large_data(str(observation), i)
-            filtered_steps.append((action, filtered_obs))
+        # Only steps added since the last iteration need filtering; the step list only grows
+        # within a run, so earlier steps are not revisited
+        first_new = self._filtered_count
+        if first_new > len(intermediate_steps) or (
+                first_new and self._filtered_cache[first_new - 1][0] is not intermediate_steps[first_new - 1][0]):
+            self._reset_run_state()
+            first_new = 0
+        
+        large = []
+        new_steps = range(first_new, len(intermediate_steps))
+        for i in new_steps:
+            action, observation = intermediate_steps[i]
+            text = observation if type(observation) is str else str(observation)
+            if action.tool in self._text_tool_names:
+                self._filtered_cache[i] = (action, text)
+            elif len(text) >= THREAD_FILTER_MIN_LENGTH:
+                large.append((i, action, text))
+            else:
+                self._filtered_cache[i] = (action, self._filter_large_data(text, i, len(text), action))
         
-        # Log the filtering
-        if len(filtered_steps) != len(intermediate_steps):
-            logger.debug(f"Filtered {len(intermediate_steps)} steps")
+        if large:
+            # Scan large observations off the event loop, a bounded number at a time
+            semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+            medium = [step for step in large if len(step[2]) <= BATCH_FILTER_MAX_LENGTH]
+            big = [step for step in large if len(step[2]) > BATCH_FILTER_MAX_LENGTH]
+            
+            async def filter_in_thread(i: int, action: AgentAction, text: str) -> str:
+                async with semaphore:
+                    return await asyncio.to_thread(self._filter_large_data, text, i, len(text), action)
+            
+            async def filter_batch_in_thread(steps) -> List[str]:
+                async with semaphore:
+                    return await asyncio.to_thread(self._filter_batch, steps)
+            
+            jobs = [filter_in_thread(i, action, text) for i, action, text in big]
+            if medium:
+                jobs.append(filter_batch_in_thread(medium))
+            results = await asyncio.gather(*jobs)
+            
+            for (i, action, _), filtered_obs in zip(big, results):
+                self._filtered_cache[i] = (action, filtered_obs)
+            if medium:
+                for (i, action, _), filtered_obs in zip(medium, results[-1]):
+                    self._filtered_cache[i] = (action, filtered_obs)
+        
+        # The executor's own list is left as is: it is returned with return_intermediate_steps
+        # and used by mcp-use to assemble the result
+        if not self._any_filtered:
+            self._any_filtered = any(
+                self._filtered_cache[i][1] is not intermediate_steps[i][1] for i in new_steps
+            )
+        self._filtered_count = len(intermediate_steps)
+        
+        # Read filtered steps through a view over the cache rather than copying the list;
+        # when nothing was ever filtered, the executor's own list is passed through
+        if self._any_filtered:
+            logger.debug("Filtered %s steps", len(intermediate_steps))
+            filtered_steps = _FilteredStepsView(self._filtered_cache, len(intermediate_steps))
+        else:
+            filtered_steps = intermediate_steps
             
         # Call parent with filtered steps
         return await super()._atake_next_step(
@@ -81,12 +287,18 @@ class FilteredMCPAgent(MCPAgent):
         # First create the standard agent components
         agent = super()._create_agent()
         
-        # Replace with our filtered executor
+        inner_agent = agent.agent
+        tools = agent.tools
+        max_iterations = agent.max_iterations
+        verbose = agent.verbose
+        
+        # Replace with our filtered executor; only image and ambiguous tools are scanned
         filtered_executor = FilteredAgentExecutor(
-            agent=agent.agent,
-            tools=agent.tools,
-            max_iterations=agent.max_iterations,
-            verbose=agent.verbose
+            agent=inner_agent,
+            tools=tools,
+            max_iterations=max_iterations,
+            verbose=verbose,
+            text_tool_names=classify_text_tools(tools)
         )
         
         return filtered_executor
\ No newline at end of file
@@ -2,11 +2,21 @@
 
 import asyncio
 import json
-import subprocess
 import logging
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from typing import AsyncIterator, Coroutine, Dict, FrozenSet, List, Optional, Any, Set, Tuple
+from dataclasses import dataclass, field
+
+from .ai_cache import make_key, get_response_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 try:
     from mcp_use import MCPAgent, MCPClient as MCPUseClient
@@ -26,6 +36,127 @@ except ImportError as e:
     FILTERED_AGENT_AVAILABLE = False
 
 
+def _encode_message(message: Dict[str, Any]) -> bytes:
+    """Serialize a JSON-RPC message as one newline-terminated line."""
+    if orjson:
+        return orjson.dumps(message) + b'\n'
+    return (json.dumps(message) + '\n').encode()
+
+
+def _decode_message(line) -> Any:
+    """Parse a JSON document (bytes or str), such as a JSON-RPC line read from a server."""
+    if orjson:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+async def _read_message(stream: asyncio.StreamReader) -> Dict[str, Any]:
+    """Read the next JSON-RPC response, skipping notifications and requests from the server."""
+    while True:
+        line = await stream.readline()
+        if not line:
+            raise ConnectionError("MCP server closed its output")
+        message = _decode_message(line)
+        if "method" not in message:
+            return message
+
+
+# Words of three or more letters in a custom prompt
+_KEY_TERM_RE = re.compile(r'\b[A-Za-z]{3,}\b')
+
+# Patterns picked out of OCR text for the content analysis sheet
+_URL_RE = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+TECH_TERMS = ["API", "HTML", "CSS", "JavaScript", "Python", "React", "Vue", "Angular", "Node.js",
+              "Docker", "Kubernetes", "AWS", "Azure", "GCP", "database", "SQL", "JSON", "XML"]
+# Terms match anywhere in the text, including inside longer words; the lookahead
+# reports a match at every position so overlapping terms are all found
+_TECH_TERM_RE = re.compile(
+    '(?=(' + '|'.join(map(re.escape, TECH_TERMS)) + '))', re.IGNORECASE
+)
+
+# Instructions for the LLM that recommends Excel actions. They never change, so they
+# come first and form a prefix that providers with prompt caching can reuse
+_ACTIONS_SYSTEM_PROMPT = """You are an Excel automation expert helping to process screenshot data using Excel MCP tools.
+
+Based on the custom request and screenshot content, recommend specific actions using the available Excel tools.
+Always respond with valid JSON: a JSON object containing
+{
+    "recommended_actions": [
+        {
+            "tool": "tool_name",
+            "reasoning": "why this tool should be used",
+            "priority": 1-10,
+            "parameters": {"key": "suggested values"}
+        }
+    ],
+    "excel_structure": {
+        "worksheets": ["suggested worksheet names"],
+        "focus_areas": ["key areas to focus on"]
+    }
+}"""
+
+# Outermost JSON object in a reply that wraps it in a code fence or prose
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+
+def _parse_json_reply(text: str) -> Any:
+    """Parse an LLM reply that should be JSON, tolerating text around the object."""
+    try:
+        return _decode_message(text)
+    except ValueError:
+        match = _JSON_OBJECT_RE.search(text)
+        if match is None:
+            raise
+        return _decode_message(match.group())
+
+
+# Characters per cell when writing text to Excel, which caps a cell at 32,767
+EXCEL_CELL_CHARS = 32000
+
+
+def _text_rows(text: str) -> List[List[str]]:
+    """Split text into single-cell rows that fit in an Excel cell, at line breaks where possible."""
+    if len(text) <= EXCEL_CELL_CHARS:
+        return [[text]]
+    
+    rows = []
+    start = 0
+    while start < len(text):
+        end = start + EXCEL_CELL_CHARS
+        if end < len(text):
+            newline = text.rfind('\n', start, end)
+            if newline > start:
+                end = newline + 1
+        rows.append([text[start:end]])
+        start = end
+    return rows
+
+
+# Largest single message line accepted from a stdio server; asyncio's default of
+# 64 KiB is too small for tools/list schemas or echoed OCR text
+STDIO_READ_LIMIT = 16 * 1024 * 1024
+
+# The handshake messages never change, so they are encoded once
+_INITIALIZE_REQUEST = _encode_message({
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2024-11-05",
+        "capabilities": {},
+        "clientInfo": {
+            "name": "SnapMark",
+            "version": "0.1.0"
+        }
+    }
+})
+_INITIALIZED_NOTIFICATION = _encode_message({
+    "jsonrpc": "2.0",
+    "method": "notifications/initialized"
+})
+
+
 @dataclass
 class MCPServerConfig:
     """Configuration for an MCP server."""
@@ -36,6 +167,274 @@ class MCPServerConfig:
     enabled: bool = True
 
 
+@dataclass
+class MCPSession:
+    """An initialized stdio connection to an MCP server."""
+    process: Any
+    init_response: Dict[str, Any]
+    tools_cache: Optional[List[Dict[str, Any]]] = None
+    tool_names: FrozenSet[str] = frozenset()
+    last_used: float = 0.0
+    # Set when the server stopped answering; the session is then replaced
+    broken: bool = False
+    # Requests awaiting a response, by JSON-RPC id
+    pending: Dict[int, asyncio.Future] = field(default_factory=dict)
+    reader: Optional[asyncio.Task] = None
+    next_id: int = 2  # 1 is the initialize request
+    
+    def start_reader(self):
+        """Start routing the server's responses to the requests waiting for them."""
+        self.reader = asyncio.create_task(self._dispatch_loop())
+    
+    def stop_reader(self):
+        if self.reader is not None and not self.reader.done():
+            # Its event loop may already be closed
+            with suppress(RuntimeError):
+                self.reader.cancel()
+    
+    async def _dispatch_loop(self):
+        """Read responses for as long as the server runs, resolving pending requests by id."""
+        error: BaseException = ConnectionError("MCP session closed")
+        try:
+            while True:
+                line = await self.process.stdout.readline()
+                if not line:
+                    raise ConnectionError("MCP server closed its output")
+                try:
+                    message = _decode_message(line)
+                except ValueError:
+                    logging.getLogger(__name__).debug("Ignoring non-JSON output from MCP server: %r", line[:200])
+                    continue
+                # Notifications and requests from the server are not answered
+                if not isinstance(message, dict) or "method" in message:
+                    continue
+                future = self.pending.pop(message.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except Exception as e:
+            error = e
+            self.broken = True
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self.pending.clear()
+    
+    async def request(self, method: str, params: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """Send a JSON-RPC request and wait for its response."""
+        (response,) = await self.request_many([(method, params)], timeout)
+        if isinstance(response, BaseException):
+            raise response
+        return response
+    
+    async def request_many(self, requests: List[Tuple[str, Dict[str, Any]]],
+                           timeout: float) -> List[Any]:
+        """Send several JSON-RPC requests in one write and wait for all the responses.
+        
+        Responses are matched by id, so a slow request doesn't hold up the others.
+        Each entry of the result is the response, or the exception for a request
+        that failed, in the order of requests.
+        """
+        if self.reader is None or self.reader.done():
+            raise ConnectionError("MCP session is not connected")
+        
+        loop = asyncio.get_running_loop()
+        ids = list(range(self.next_id, self.next_id + len(requests)))
+        self.next_id += len(requests)
+        futures = []
+        for request_id in ids:
+            futures.append(loop.create_future())
+            self.pending[request_id] = futures[-1]
+        
+        try:
+            self.process.stdin.write(b''.join(
+                _encode_message({
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "method": method,
+                    "params": params
+                })
+                for request_id, (method, params) in zip(ids, requests)
+            ))
+            await self.process.stdin.drain()
+            return await asyncio.gather(
+                *(self._wait(future, timeout) for future in futures), return_exceptions=True
+            )
+        finally:
+            for request_id in ids:
+                self.pending.pop(request_id, None)
+    
+    async def _wait(self, future: asyncio.Future, timeout: float) -> Dict[str, Any]:
+        try:
+            async with asyncio.timeout(timeout):
+                return await future
+        except TimeoutError:
+            # A late reply is dropped by the reader, but the server is likely stuck
+            self.broken = True
+            raise TimeoutError(f"No response from MCP server within {timeout}s")
+
+
+class MCPSessionPool:
+    """Keeps one stdio MCP server process per server config alive between screenshots.
+    
+    The subprocess, the initialize handshake and the tools/list response are reused
+    instead of being repeated on every call. Sessions idle for longer than ttl seconds
+    are closed by a background sweeper.
+    """
+    
+    def __init__(self, ttl: float = 300.0, init_timeout: float = 10.0):
+        self.ttl = ttl
+        self.init_timeout = init_timeout
+        self.logger = logging.getLogger(__name__)
+        self._sessions: Dict[Tuple, MCPSession] = {}
+        self._locks: Dict[Tuple, asyncio.Lock] = {}
+        self._loop = None
+        self._sweeper = None
+    
+    @staticmethod
+    def _key(server: MCPServerConfig) -> Tuple:
+        env = frozenset(server.env.items()) if server.env else frozenset()
+        return (server.name, server.command, tuple(server.args), env)
+    
+    @asynccontextmanager
+    async def acquire(self, server: MCPServerConfig) -> AsyncIterator[MCPSession]:
+        """Hold the session for server exclusively, starting it if needed."""
+        self._bind_loop()
+        key = self._key(server)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        
+        async with lock:
+            session = self._sessions.get(key)
+            if session is not None and (session.broken or session.process.returncode is not None):
+                del self._sessions[key]
+                await self._terminate(session)
+                session = None
+            
+            if session is None:
+                session = await self._open(server)
+                self._sessions[key] = session
+                self._start_sweeper()
+            
+            try:
+                yield session
+            except BaseException:
+                # A request may have been left half-written, so don't reuse the stream
+                self._sessions.pop(key, None)
+                self._kill(session)
+                raise
+            finally:
+                session.last_used = time.monotonic()
+    
+    async def _open(self, server: MCPServerConfig) -> MCPSession:
+        """Start the server process and run the MCP initialize handshake."""
+        cmd = [server.command] + server.args
+        env = dict(server.env) if server.env else None
+        
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            env=env,
+            limit=STDIO_READ_LIMIT
+        )
+        
+        try:
+            async with asyncio.timeout(self.init_timeout):
+                init_response = await self._handshake(process)
+        except BaseException:
+            self._kill_process(process)
+            raise
+        
+        self.logger.debug("Started MCP session for %s", server.name)
+        session = MCPSession(process=process, init_response=init_response, last_used=time.monotonic())
+        session.start_reader()
+        return session
+    
+    async def _handshake(self, process) -> Dict[str, Any]:
+        """Run the MCP initialize handshake and return the server's response."""
+        # MCP handshake: Initialize
+        process.stdin.write(_INITIALIZE_REQUEST)
+        await process.stdin.drain()
+        
+        # Read initialize response
+        init_response = await _read_message(process.stdout)
+        self.logger.debug("MCP init response: %s", init_response)
+        
+        # Send initialized notification (required by MCP protocol)
+        process.stdin.write(_INITIALIZED_NOTIFICATION)
+        await process.stdin.drain()
+        return init_response
+    
+    def _bind_loop(self):
+        """Drop sessions spawned on a different event loop, which can't be used here."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        
+        for session in self._sessions.values():
+            self._kill(session)
+        self._sessions.clear()
+        self._locks.clear()
+        self._sweeper = None
+        self._loop = loop
+    
+    def _start_sweeper(self):
+        if self._sweeper is None and self.ttl > 0:
+            self._sweeper = asyncio.create_task(self._sweep())
+    
+    async def _sweep(self):
+        """Close sessions that have been idle for longer than the TTL."""
+        try:
+            while self._sessions:
+                await asyncio.sleep(self.ttl / 2)
+                now = time.monotonic()
+                for key, session in list(self._sessions.items()):
+                    if not self._locks[key].locked() and now - session.last_used >= self.ttl:
+                        del self._sessions[key]
+                        self.logger.debug("Closing idle MCP session for %s", key[0])
+                        await self._terminate(session)
+        finally:
+            if self._sweeper is asyncio.current_task():
+                self._sweeper = None
+    
+    async def _terminate(self, session: MCPSession):
+        """Ask the server to exit by closing its stdin, killing it if it doesn't."""
+        process = session.process
+        if process.returncode is None:
+            try:
+                process.stdin.close()
+                await asyncio.wait_for(process.wait(), timeout=5)
+            except Exception:
+                self._kill_process(process)
+        session.stop_reader()
+    
+    def _kill(self, session: MCPSession):
+        self._kill_process(session.process)
+        session.stop_reader()
+    
+    @staticmethod
+    def _kill_process(process):
+        if process.returncode is None:
+            with suppress(ProcessLookupError):
+                process.kill()
+    
+    async def close(self):
+        """Close all pooled sessions."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        self._locks.clear()
+        if self._loop is not asyncio.get_running_loop():
+            for session in sessions:
+                self._kill(session)
+            return
+        await asyncio.gather(*(self._terminate(session) for session in sessions), return_exceptions=True)
+
+
 class MCPClient:
     """Enhanced MCP client with mcp-use integration for intelligent task execution."""
     
@@ -44,8 +443,11 @@ class MCPClient:
         self.logger = logging.getLogger(__name__)
         self.mcp_use_client = None
         self.mcp_agent = None
+        # Tasks started by this client, cancelled on close()
+        self._owned_tasks: Set[asyncio.Task] = set()
         self._load_config()
         self._initialize_mcp_use()
+        self.session_pool = MCPSessionPool(ttl=self._session_ttl, init_timeout=self._init_timeout)
     
     async def __aenter__(self):
         """Async context manager entry."""
@@ -57,6 +459,19 @@ class MCPClient:
     
     async def close(self):
         """Properly close all MCP connections and cleanup resources."""
+        global _shared_client
+        with _shared_client_lock:
+            if _shared_client is self:
+                _shared_client = None
+        
+        if self._owned_tasks:
+            tasks = list(self._owned_tasks)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        await self.session_pool.close()
+        
         if self.mcp_use_client:
             try:
                 # Close mcp-use client connections properly
@@ -71,50 +486,35 @@ class MCPClient:
                         elif hasattr(session_manager, 'close'):
                             await session_manager.close()
                         
-                        # Also check for individual sessions to close
+                        # Also close individual sessions, together and with a bounded wait
                         if hasattr(session_manager, '_sessions'):
                             sessions = getattr(session_manager, '_sessions', {})
-                            for session in sessions.values():
-                                if hasattr(session, 'close'):
-                                    try:
-                                        await session.close()
-                                    except Exception as session_e:
-                                        self.logger.debug(f"Error closing individual session: {session_e}")
-                
-                # Wait a brief moment for sessions to close naturally
-                import asyncio
-                await asyncio.sleep(0.1)
-                
-                # Cancel any remaining pending tasks related to mcp-use
-                try:
-                    current_task = asyncio.current_task()
-                    if current_task:
-                        for task in asyncio.all_tasks():
-                            if task != current_task and not task.done():
-                                # Check if task is related to MCP operations
-                                task_repr = str(task)
-                                if any(keyword in task_repr.lower() for keyword in ['mcp', 'session', 'transport']):
-                                    task.cancel()
-                                    try:
-                                        await asyncio.wait_for(task, timeout=0.5)
-                                    except (asyncio.CancelledError, asyncio.TimeoutError):
-                                        pass
-                                    except Exception as task_e:
-                                        self.logger.debug(f"Error cancelling MCP task: {task_e}")
-                except Exception as cleanup_e:
-                    self.logger.debug(f"Error during task cleanup: {cleanup_e}")
+                            closing = [
+                                asyncio.wait_for(session.close(), timeout=1.0)
+                                for session in sessions.values() if hasattr(session, 'close')
+                            ]
+                            for outcome in await asyncio.gather(*closing, return_exceptions=True):
+                                if isinstance(outcome, Exception):
+                                    self.logger.debug("Error closing individual session: %s", outcome)
                 
                 self.logger.debug("mcp-use client closed successfully")
             except Exception as e:
-                self.logger.warning(f"Error closing mcp-use client: {e}")
+                self.logger.warning("Error closing mcp-use client: %s", e)
             finally:
                 self.mcp_use_client = None
                 self.mcp_agent = None
     
+    def _spawn(self, coro: Coroutine) -> asyncio.Task:
+        """Start a task owned by this client, so close() can cancel it."""
+        task = asyncio.create_task(coro)
+        self._owned_tasks.add(task)
+        task.add_done_callback(self._owned_tasks.discard)
+        return task
+    
     def _initialize_mcp_use(self):
         """Initialize mcp-use client and agent if available."""
         if not MCP_USE_AVAILABLE:
-            self.logger.info(f"mcp-use not available ({MCP_USE_IMPORT_ERROR}), using traditional MCP processing only")
+            self.logger.info("mcp-use not available (%s), using traditional MCP processing only", MCP_USE_IMPORT_ERROR)
             return
         
         try:
@@ -134,7 +534,7 @@ class MCPClient:
                     api_key=vlm_config.get('openai_api_key'),
                     temperature=0.3
                 )
-                self.logger.info(f"Initialized OpenAI LLM with model: {vlm_config.get('openai_model', 'gpt-4o')}")
+                self.logger.info("Initialized OpenAI LLM with model: %s", vlm_config.get('openai_model', 'gpt-4o'))
             elif vlm_config.get('provider') == 'ollama':
                 # Initialize Ollama LLM - use ollama_model if set, otherwise fall back to model
                 ollama_model = vlm_config.get('ollama_model', vlm_config.get('model', 'llama3.2'))
@@ -143,7 +543,7 @@ class MCPClient:
                     base_url=vlm_config.get('api_url', 'http://localhost:11434'),
                     temperature=0.3
                 )
-                self.logger.info(f"Initialized Ollama LLM with model: {ollama_model}")
+                self.logger.info("Initialized Ollama LLM with model: %s", ollama_model)
             
             if llm:
                 
@@ -165,7 +565,7 @@ class MCPClient:
                             max_steps=30,
                             # session_options=session_options
                         )
-                        self.logger.info(f"✅ Successfully initialized mcp-use client with FilteredMCPAgent (image filtering enabled) with {timeout}s timeout")
+                        self.logger.info("✅ Successfully initialized mcp-use client with FilteredMCPAgent (image filtering enabled) with %ss timeout", timeout)
                     else:
                         self.mcp_agent = MCPAgent(
                             llm=llm, 
@@ -173,14 +573,14 @@ class MCPClient:
                             max_steps=30,
                             # session_options=session_options
                         )
-                        self.logger.info(f"✅ Successfully initialized mcp-use client and standard agent with {timeout}s timeout")
+                        self.logger.info("✅ Successfully initialized mcp-use client and standard agent with %ss timeout", timeout)
                 else:
                     self.logger.info("⚠️  No mcp-use config file found, using basic initialization")
             else:
                 self.logger.info("⚠️  Neither OpenAI nor Ollama configured, mcp-use features limited")
                 
         except Exception as e:
-            self.logger.error(f"❌ Failed to initialize mcp-use: {e}")
+            self.logger.error("❌ Failed to initialize mcp-use: %s", e)
     
     async def run_intelligent_task(self, task_description: str, context_data: Dict[str, Any] = None) -> Dict[str, Any]:
         """Run an intelligent task using mcp-use agent."""
@@ -190,17 +590,19 @@ class MCPClient:
         try:
             # Enhance task description with context
             if context_data:
-                enhanced_task = f"{task_description}\n\nContext:\n"
+                parts = [f"{task_description}\n\nContext:\n"]
                 for key, value in context_data.items():
                     if isinstance(value, str) and len(value) > 200:
-                        enhanced_task += f"- {key}: {value[:200]}...\n"
+                        parts.append(f"- {key}: {value[:200]}...\n")
                     else:
-                        enhanced_task += f"- {key}: {value}\n"
+                        parts.append(f"- {key}: {value}\n")
+                enhanced_task = "".join(parts)
             else:
                 enhanced_task = task_description
             
             # Run the agent
-            result = await self.mcp_agent.run(enhanced_task)
+            async with asyncio.timeout(self.agent_timeout):
+                result = await self.mcp_agent.run(enhanced_task)
             
             return {
                 "success": True,
@@ -208,8 +610,11 @@ class MCPClient:
                 "agent_used": True
             }
             
+        except TimeoutError:
+            self.logger.error("MCP agent task timed out after %ss", self.agent_timeout)
+            return {"error": f"Timed out after {self.agent_timeout}s", "agent_used": True}
         except Exception as e:
-            self.logger.error(f"MCP agent task failed: {e}")
+            self.logger.error("MCP agent task failed: %s", e)
             return {"error": str(e), "agent_used": True}
     
     def is_agent_available(self) -> bool:
@@ -221,21 +626,26 @@ class MCPClient:
         from ..config import config
         
         # Load from SnapMark config
+        self._config_version = config.version
         mcp_config = config.get('mcp', {})
         
-        # Configuration loading info
-        self.logger.info("=== MCP Configuration Loading ===")
-        self.logger.info(f"MCP enabled: {mcp_config.get('enabled', False)}")
+        # Settings read on every screenshot are resolved once here
+        self._mcp_enabled = bool(mcp_config.get('enabled', False))
+        self._mcp_timeout = mcp_config.get('timeout', 120.0)
+        self._mcp_max_concurrency = mcp_config.get('max_concurrency', 4)
+        self._session_ttl = mcp_config.get('session_ttl', 300.0)
+        self._init_timeout = mcp_config.get('init_timeout', 10.0)
+        self.agent_timeout = mcp_config.get('agent_timeout', 120.0)
+        self.call_timeout = mcp_config.get('call_timeout', 30.0)
+        self._pipeline_tool_calls = bool(mcp_config.get('pipeline_tool_calls', True))
         
-        if not mcp_config.get('enabled', False):
-            self.logger.info("MCP is disabled, skipping server configuration")
+        if not self._mcp_enabled:
+            self.logger.debug("MCP is disabled, skipping server configuration")
             return
         
         servers_config = mcp_config.get('servers', {})
-        self.logger.info(f"Loading {len(servers_config)} server configurations")
         
         for name, server_config in servers_config.items():
-            self.logger.info(f"Processing server '{name}'")
             if isinstance(server_config, dict):
                 server = MCPServerConfig(
                     name=name,
@@ -245,15 +655,25 @@ class MCPClient:
                     enabled=server_config.get('enabled', True)
                 )
                 self.servers[name] = server
-                self.logger.info(f"Added server '{name}': enabled={server.enabled}")
+                self.logger.debug("Added MCP server %s: enabled=%s", name, server.enabled)
+        
+        self.logger.info("Loaded %d MCP server configurations", len(self.servers))
+    
+    def _sync_config(self):
+        """Reload the MCP settings and servers if the config changed since they were read."""
+        from ..config import config
+        if config.version == self._config_version:
+            return
         
-        self.logger.info(f"Total servers loaded: {len(self.servers)}")
-        self.logger.info("=== MCP Configuration Complete ===")
+        self.servers = {}
+        self._load_config()
+        self.session_pool.ttl = self._session_ttl
+        self.session_pool.init_timeout = self._init_timeout
     
     def is_enabled(self) -> bool:
         """Check if MCP integration is enabled."""
-        from ..config import config
-        return config.get('mcp.enabled', False) and len(self.servers) > 0
+        self._sync_config()
+        return self._mcp_enabled and bool(self.servers)
     
     def get_enabled_servers(self) -> List[MCPServerConfig]:
         """Get list of enabled MCP servers."""
@@ -277,10 +697,20 @@ class MCPClient:
         Returns:
             Dictionary with results from each MCP server
         """
+        self._sync_config()
+        use_agent = bool(custom_prompt) and self.is_agent_available()
+        if not use_agent and not self.is_enabled():
+            return {}
+        
         results = {}
         
+        try:
+            timestamp = Path(image_path).stat().st_mtime
+        except (OSError, TypeError):
+            timestamp = 0
+        
         # Try mcp-use agent first if available and custom prompt provided
-        if custom_prompt and self.is_agent_available():
+        if use_agent:
             try:
                 self.logger.info("Using mcp-use agent for intelligent processing")
                 
@@ -290,13 +720,13 @@ class MCPClient:
                     "markdown_path": markdown_path,
                     "ocr_text": ocr_text,
                     "vlm_description": vlm_description,
-                    "timestamp": Path(image_path).stat().st_mtime if Path(image_path).exists() else 0
+                    "timestamp": timestamp
                 }
                 
                 # Run intelligent task using mcp-use agent
-                agent_result = await self.run_intelligent_task(
+                agent_result = await self._spawn(self.run_intelligent_task(
                     custom_prompt, context_data
-                )
+                ))
                 
                 results["mcp_use_agent"] = agent_result
                 
@@ -305,7 +735,7 @@ class MCPClient:
                     self.logger.info("mcp-use agent processing completed successfully")
                     
             except Exception as e:
-                self.logger.error(f"mcp-use agent processing failed: {e}")
+                self.logger.error("mcp-use agent processing failed: %s", e)
                 results["mcp_use_agent"] = {"error": str(e), "fallback_to_traditional": True}
         else:
             # Traditional MCP server processing
@@ -323,18 +753,44 @@ class MCPClient:
                 "ocr_text": ocr_text,
                 "vlm_description": vlm_description,
                 "custom_prompt": custom_prompt,
-                "timestamp": Path(image_path).stat().st_mtime if Path(image_path).exists() else 0
+                "timestamp": timestamp
             }
             
-            # Process through each enabled server
-            for server in enabled_servers:
+            # Process through all enabled servers concurrently with a shared timeout,
+            # at most mcp.max_concurrency at a time
+            timeout = self._mcp_timeout
+            semaphore = asyncio.Semaphore(self._mcp_max_concurrency)
+            
+            async def interact(server: MCPServerConfig) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self._interact_with_server(server, data_payload)
+            
+            tasks = {
+                self._spawn(interact(server)): server.name
+                for server in enabled_servers
+            }
+            self.logger.info("Processing data through MCP servers: %s", ', '.join(tasks.values()))
+            pending = set(tasks)
+            try:
+                done, pending = await asyncio.wait(tasks, timeout=timeout)
+            finally:
+                # Also reached if we are cancelled; wait for the cancelled tasks so they
+                # release their pooled sessions before we return
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    await asyncio.gather(*pending, return_exceptions=True)
+            
+            for task in pending:
+                self.logger.error("MCP server %s timed out after %ss", tasks[task], timeout)
+                results[tasks[task]] = {"error": f"Timed out after {timeout}s"}
+            
+            for task in done:
                 try:
-                    self.logger.info(f"Processing data through MCP server: {server.name}")
-                    result = await self._interact_with_server(server, data_payload)
-                    results[server.name] = result
+                    results[tasks[task]] = task.result()
                 except Exception as e:
-                    self.logger.error(f"Error processing with MCP server {server.name}: {e}")
-                    results[server.name] = {"error": str(e)}
+                    self.logger.error("Error processing with MCP server %s: %s", tasks[task], e)
+                    results[tasks[task]] = {"error": str(e)}
         
         return results
     
@@ -351,75 +807,21 @@ class MCPClient:
                 return await self._custom_server_interaction(server, data)
                 
         except Exception as e:
-            self.logger.error(f"Failed to interact with server {server.name}: {e}")
+            self.logger.error("Failed to interact with server %s: %s", server.name, e)
             raise
     
     async def _stdio_interaction(self, 
                                server: MCPServerConfig, 
                                data: Dict[str, Any]) -> Dict[str, Any]:
-        """Interact with MCP server via stdio protocol."""
-        # Build command
-        cmd = [server.command] + server.args
-        env = dict(server.env) if server.env else None
-        
-        # Execute server command
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            env=env
-        )
-        
+        """Interact with MCP server via stdio protocol, reusing a pooled session."""
         try:
-            # MCP handshake: Initialize
-            init_request = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {},
-                    "clientInfo": {
-                        "name": "SnapMark",
-                        "version": "0.1.0"
-                    }
-                }
-            }
-            
-            # Send initialize request
-            init_json = json.dumps(init_request) + '\n'
-            process.stdin.write(init_json.encode())
-            await process.stdin.drain()
-            
-            # Read initialize response
-            init_response_line = await process.stdout.readline()
-            init_response = json.loads(init_response_line.decode().strip())
-            self.logger.debug(f"MCP init response: {init_response_line.decode().strip()}")
-            
-            # Send initialized notification (required by MCP protocol)
-            initialized_notification = {
-                "jsonrpc": "2.0",
-                "method": "notifications/initialized"
-            }
-            
-            process.stdin.write((json.dumps(initialized_notification) + '\n').encode())
-            await process.stdin.drain()
-            
-            # Now automatically process screenshot data based on server capabilities
-            result = await self._process_with_available_tools(process, server, data, init_response)
-            
-            return result
-            
+            async with self.session_pool.acquire(server) as session:
+                # Now automatically process screenshot data based on server capabilities
+                return await self._process_with_available_tools(session, server, data)
+                
         except Exception as e:
-            self.logger.error(f"MCP stdio communication error: {e}")
+            self.logger.error("MCP stdio communication error: %s", e)
             raise
-        finally:
-            try:
-                process.stdin.close()
-                await process.wait()
-            except:
-                pass
     
     async def _custom_server_interaction(self, 
                                        server: MCPServerConfig, 
@@ -431,47 +833,60 @@ class MCPClient:
         cmd = [server.command] + server.args
         env = dict(server.env) if server.env else None
         
-        # Create a temporary file with the data
+        # Create a temporary file with the data (off the event loop, OCR text can be large)
         import tempfile
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            json.dump(data, f)
-            temp_file = f.name
+        
+        def write_temp_file() -> str:
+            with tempfile.NamedTemporaryFile(mode='wb', suffix='.json', delete=False) as f:
+                f.write(_encode_message(data))
+                return f.name
+        
+        temp_file = await asyncio.to_thread(write_temp_file)
         
         try:
             # Add temp file path to arguments
             cmd.append(temp_file)
             
-            # Execute command
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                env=env,
-                timeout=30
+            # Execute command without blocking the event loop
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=env
             )
+            try:
+                async with asyncio.timeout(self.call_timeout):
+                    stdout, stderr = await process.communicate()
+            except TimeoutError:
+                MCPSessionPool._kill_process(process)
+                await process.wait()
+                raise
             
-            if result.returncode != 0:
-                raise Exception(f"Server command failed: {result.stderr}")
+            if process.returncode != 0:
+                raise Exception(f"Server command failed: {stderr.decode(errors='replace')}")
             
             # Try to parse JSON response
             try:
-                return json.loads(result.stdout)
-            except json.JSONDecodeError:
-                return {"output": result.stdout, "success": True}
+                return _decode_message(stdout)
+            except ValueError:
+                return {"output": stdout.decode(errors='replace'), "success": True}
                 
         finally:
             # Clean up temp file
             Path(temp_file).unlink(missing_ok=True)
     
     async def _process_with_available_tools(self, 
-                                          process, 
+                                          session: MCPSession, 
                                           server: MCPServerConfig, 
-                                          data: Dict[str, Any],
-                                          init_response: Dict[str, Any]) -> Dict[str, Any]:
+                                          data: Dict[str, Any]) -> Dict[str, Any]:
         """Process screenshot data using available MCP tools."""
         try:
-            # First, get available tools
-            tools = await self._get_available_tools(process)
+            # First, get available tools (listed once per session)
+            tools = session.tools_cache
+            if not tools:
+                tools = await self._get_available_tools(session)
+                session.tools_cache = tools
+                session.tool_names = frozenset(tool.get("name") for tool in tools)
             
             if not tools:
                 return {
@@ -481,7 +896,7 @@ class MCPClient:
                 }
             
             # Process screenshot data based on available tools
-            results = await self._execute_screenshot_processing(process, server, data, tools)
+            results = await self._execute_screenshot_processing(session, server, data, tools)
             
             return {
                 "success": True,
@@ -491,45 +906,33 @@ class MCPClient:
             }
             
         except Exception as e:
-            self.logger.error(f"Error processing with tools: {e}")
+            self.logger.error("Error processing with tools: %s", e)
+            session.broken = True
             return {
                 "success": False,
                 "error": str(e),
                 "message": f"Failed to process with {server.name}"
             }
     
-    async def _get_available_tools(self, process) -> List[Dict[str, Any]]:
+    async def _get_available_tools(self, session: MCPSession) -> List[Dict[str, Any]]:
         """Get list of available tools from MCP server."""
         try:
-            # Request tools list
-            list_tools_request = {
-                "jsonrpc": "2.0",
-                "id": 2,
-                "method": "tools/list",
-                "params": {}
-            }
-            
-            process.stdin.write((json.dumps(list_tools_request) + '\n').encode())
-            await process.stdin.drain()
-            
-            # Read tools response
-            tools_response_line = await process.stdout.readline()
-            tools_response = json.loads(tools_response_line.decode().strip())
+            tools_response = await session.request("tools/list", {}, self.call_timeout)
             
             if "result" in tools_response and "tools" in tools_response["result"]:
                 tools = tools_response["result"]["tools"]
-                self.logger.debug(f"Found {len(tools)} available tools")
+                self.logger.debug("Found %s available tools", len(tools))
                 return tools
             else:
-                self.logger.warning(f"No tools found in response: {tools_response}")
+                self.logger.warning("No tools found in response: %s", tools_response)
                 return []
                 
         except Exception as e:
-            self.logger.error(f"Failed to get available tools: {e}")
+            self.logger.error("Failed to get available tools: %s", e)
             return []
     
     async def _execute_screenshot_processing(self, 
-                                           process, 
+                                           session: MCPSession, 
                                            server: MCPServerConfig, 
                                            data: Dict[str, Any], 
                                            tools: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -539,6 +942,8 @@ class MCPClient:
         if data.get("custom_prompt"):
             llm_actions = await self._get_llm_driven_actions(data, tools)
         
+        tool_names = session.tool_names
+        
         results = {
             "tool_results": [],
             "files_created": [],
@@ -558,21 +963,11 @@ class MCPClient:
         excel_filename = f"{image_path.stem}_data.xlsx"
         excel_filepath = str(export_dir.absolute() / excel_filename)
         
-        tool_id = 3  # Start tool IDs from 3 (after init and tools/list)
+        # Calls are grouped into stages that depend only on earlier stages; the calls
+        # in a stage are in flight together
+        stages = []
         
-        # Step 1: Create workbook if create_workbook tool is available
-        if self._has_tool(tools, "create_workbook"):
-            try:
-                result = await self._call_tool(process, tool_id, "create_workbook", {
-                    "filepath": excel_filepath
-                })
-                results["tool_results"].append({"tool": "create_workbook", "result": result})
-                results["files_created"].append(excel_filepath)
-                tool_id += 1
-            except Exception as e:
-                self.logger.error(f"Failed to create workbook: {e}")
-        
-        # Step 2: Create additional worksheets based on LLM guidance or defaults
+        # Worksheets to create, based on LLM guidance or defaults
         if llm_actions:
             # Use LLM-recommended worksheets
             worksheets_to_create = llm_actions.get("excel_structure", {}).get("worksheets", [])
@@ -582,20 +977,47 @@ class MCPClient:
             # Default worksheets
             worksheets_to_create = ["OCR Text", "VLM Description", "Content Analysis"]
         
-        if self._has_tool(tools, "create_worksheet"):
-            for sheet_name in worksheets_to_create:
-                try:
-                    result = await self._call_tool(process, tool_id, "create_worksheet", {
+        # Text sheets are only needed when there is text to put in them
+        empty_sheets = set()
+        if not data.get("ocr_text"):
+            empty_sheets.add("OCR Text")
+        if not data.get("vlm_description"):
+            empty_sheets.add("VLM Description")
+        worksheets_to_create = [name for name in worksheets_to_create if name not in empty_sheets]
+        
+        # Steps 1-2: Create the workbook and its worksheets in a single call when the
+        # server has a bulk tool for it
+        if "create_workbook_with_sheets" in tool_names:
+            stages.append([("create_workbook_with_sheets", {
+                "filepath": excel_filepath,
+                "sheets": worksheets_to_create
+            }, {"tool": "create_workbook_with_sheets", "sheets": worksheets_to_create})])
+            results["files_created"].append(excel_filepath)
+        else:
+            # Step 1: Create workbook if create_workbook tool is available
+            if "create_workbook" in tool_names:
+                stages.append([("create_workbook", {
+                    "filepath": excel_filepath
+                }, {"tool": "create_workbook"})])
+                results["files_created"].append(excel_filepath)
+            
+            # Step 2: Create additional worksheets
+            if "create_worksheet" in tool_names and worksheets_to_create:
+                stages.append([
+                    ("create_worksheet", {
                         "filepath": excel_filepath,
                         "sheet_name": sheet_name
-                    })
-                    results["tool_results"].append({"tool": "create_worksheet", "sheet": sheet_name, "result": result})
-                    tool_id += 1
-                except Exception as e:
-                    self.logger.error(f"Failed to create worksheet {sheet_name}: {e}")
+                    }, {"tool": "create_worksheet", "sheet": sheet_name})
+                    for sheet_name in worksheets_to_create
+                ])
+        
+        # Data writes and header formatting only need the worksheets to exist, so they
+        # share the last stage; a server that handles requests in order still writes
+        # each sheet before formatting it
+        writes = []
         
-        # Step 3: Write screenshot metadata to main sheet
-        if self._has_tool(tools, "write_data_to_excel"):
+        if "write_data_to_excel" in tool_names:
+            # Step 3: Write screenshot metadata to main sheet
             try:
                 # Prepare metadata
                 import datetime
@@ -612,57 +1034,38 @@ class MCPClient:
                     ["LLM Guidance Applied", "Yes" if llm_actions else "No"]
                 ]
                 
-                result = await self._call_tool(process, tool_id, "write_data_to_excel", {
+                writes.append(("write_data_to_excel", {
                     "filepath": excel_filepath,
                     "sheet_name": "Sheet",  # Default sheet name
                     "data": metadata,
                     "start_cell": "A1"
-                })
-                results["tool_results"].append({"tool": "write_data_to_excel", "sheet": "Screenshot Data", "result": result})
-                tool_id += 1
+                }, {"tool": "write_data_to_excel", "sheet": "Screenshot Data"}))
             except Exception as e:
-                self.logger.error(f"Failed to write metadata: {e}")
-        
-        # Step 4: Write OCR text to OCR Text sheet
-        if self._has_tool(tools, "write_data_to_excel") and data.get("ocr_text"):
-            try:
-                ocr_data = [
-                    ["OCR Text Content"],
-                    [data.get("ocr_text", "")]
-                ]
+                self.logger.error("Failed to write metadata: %s", e)
+            
+            # Step 4: Write OCR text to OCR Text sheet
+            if data.get("ocr_text"):
+                ocr_data = [["OCR Text Content"]] + _text_rows(data["ocr_text"])
                 
-                result = await self._call_tool(process, tool_id, "write_data_to_excel", {
+                writes.append(("write_data_to_excel", {
                     "filepath": excel_filepath,
                     "sheet_name": "OCR Text",
                     "data": ocr_data,
                     "start_cell": "A1"
-                })
-                results["tool_results"].append({"tool": "write_data_to_excel", "sheet": "OCR Text", "result": result})
-                tool_id += 1
-            except Exception as e:
-                self.logger.error(f"Failed to write OCR text: {e}")
-        
-        # Step 5: Write VLM description to VLM Description sheet
-        if self._has_tool(tools, "write_data_to_excel") and data.get("vlm_description"):
-            try:
-                vlm_data = [
-                    ["VLM Description Content"],
-                    [data.get("vlm_description", "")]
-                ]
+                }, {"tool": "write_data_to_excel", "sheet": "OCR Text"}))
+            
+            # Step 5: Write VLM description to VLM Description sheet
+            if data.get("vlm_description"):
+                vlm_data = [["VLM Description Content"]] + _text_rows(data["vlm_description"])
                 
-                result = await self._call_tool(process, tool_id, "write_data_to_excel", {
+                writes.append(("write_data_to_excel", {
                     "filepath": excel_filepath,
                     "sheet_name": "VLM Description",
                     "data": vlm_data,
                     "start_cell": "A1"
-                })
-                results["tool_results"].append({"tool": "write_data_to_excel", "sheet": "VLM Description", "result": result})
-                tool_id += 1
-            except Exception as e:
-                self.logger.error(f"Failed to write VLM description: {e}")
-        
-        # Step 6: Create content analysis (enhanced with LLM guidance)
-        if self._has_tool(tools, "write_data_to_excel"):
+                }, {"tool": "write_data_to_excel", "sheet": "VLM Description"}))
+            
+            # Step 6: Create content analysis (enhanced with LLM guidance)
             try:
                 # Analyze content and extract key information
                 if llm_actions:
@@ -672,36 +1075,44 @@ class MCPClient:
                     # Use default analysis
                     analysis_data = self._analyze_screenshot_content(data)
                 
-                result = await self._call_tool(process, tool_id, "write_data_to_excel", {
+                writes.append(("write_data_to_excel", {
                     "filepath": excel_filepath,
                     "sheet_name": "Content Analysis",
                     "data": analysis_data,
                     "start_cell": "A1"
-                })
-                results["tool_results"].append({"tool": "write_data_to_excel", "sheet": "Content Analysis", "result": result})
-                tool_id += 1
+                }, {"tool": "write_data_to_excel", "sheet": "Content Analysis"}))
             except Exception as e:
-                self.logger.error(f"Failed to write content analysis: {e}")
+                self.logger.error("Failed to write content analysis: %s", e)
         
         # Step 7: Apply formatting to make the Excel file more readable
-        if self._has_tool(tools, "format_range"):
-            try:
-                # Format headers in each sheet
-                sheets_to_format = ["Sheet", "OCR Text", "VLM Description", "Content Analysis"]
-                for sheet_name in sheets_to_format:
-                    result = await self._call_tool(process, tool_id, "format_range", {
-                        "filepath": excel_filepath,
-                        "sheet_name": sheet_name,
-                        "start_cell": "A1",
-                        "end_cell": "Z1",  # Format entire first row
-                        "bold": True,
-                        "bg_color": "366092",
-                        "font_color": "FFFFFF"
-                    })
-                    results["tool_results"].append({"tool": "format_range", "sheet": sheet_name, "result": result})
-                    tool_id += 1
-            except Exception as e:
-                self.logger.error(f"Failed to format headers: {e}")
+        if "format_range" in tool_names:
+            # Format headers in each sheet
+            sheets_to_format = [
+                name for name in ("Sheet", "OCR Text", "VLM Description", "Content Analysis")
+                if name not in empty_sheets
+            ]
+            writes.extend([
+                ("format_range", {
+                    "filepath": excel_filepath,
+                    "sheet_name": sheet_name,
+                    "start_cell": "A1",
+                    "end_cell": "Z1",  # Format entire first row
+                    "bold": True,
+                    "bg_color": "366092",
+                    "font_color": "FFFFFF"
+                }, {"tool": "format_range", "sheet": sheet_name})
+                for sheet_name in sheets_to_format
+            ])
+        
+        if writes:
+            stages.append(writes)
+        
+        for stage in stages:
+            calls = [(tool_name, arguments) for tool_name, arguments, _ in stage]
+            responses = await self._call_tools_batch(session, calls)
+            for (_, _, record), result in zip(stage, responses):
+                record["result"] = result
+                results["tool_results"].append(record)
         
         # Update summary with LLM guidance info
         llm_info = " (with LLM guidance)" if llm_actions else ""
@@ -717,34 +1128,15 @@ class MCPClient:
             # Initialize VLM processor
             vlm = VLMProcessor()
             
-            # Build context for LLM
+            # Build context for LLM, from the slowest-changing part (the server's
+            # tools) to the per-screenshot content
             tool_names = [tool['name'] for tool in tools]
-            context = f"""
-You are an AI assistant helping to process screenshot data using Excel MCP tools. 
-
-Available tools: {', '.join(tool_names)}
+            context = f"""Available tools: {', '.join(tool_names)}
 
 Screenshot context:
 - OCR Text: {data.get('ocr_text', '')[:500]}...
 - VLM Description: {data.get('vlm_description', '')[:500]}...
 - Custom Request: {data.get('custom_prompt', '')}
-
-Based on the custom request and screenshot content, recommend specific actions using the available Excel tools.
-Respond with a JSON object containing:
-{{
-    "recommended_actions": [
-        {{
-            "tool": "tool_name",
-            "reasoning": "why this tool should be used",
-            "priority": 1-10,
-            "parameters": {{"key": "suggested values"}}
-        }}
-    ],
-    "excel_structure": {{
-        "worksheets": ["suggested worksheet names"],
-        "focus_areas": ["key areas to focus on"]
-    }}
-}}
 """
             
             # For text-only LLM request (since we don't need image analysis here)
@@ -758,42 +1150,58 @@ Respond with a JSON object containing:
             return response
             
         except Exception as e:
-            self.logger.error(f"Failed to get LLM-driven actions: {e}")
+            self.logger.error("Failed to get LLM-driven actions: %s", e)
             return self._get_default_actions(data, tools)
     
     async def _call_llm_for_actions(self, vlm: 'VLMProcessor', context: str) -> Dict[str, Any]:
         """Call LLM to get recommended actions."""
         try:
-            import json
-            
             if vlm.provider.value == 'openai' and vlm.openai_client:
-                response = vlm.openai_client.chat.completions.create(
-                    model=vlm.model,
-                    messages=[
-                        {"role": "system", "content": "You are an Excel automation expert. Always respond with valid JSON."},
-                        {"role": "user", "content": context}
-                    ],
-                    temperature=0.3,
-                    max_tokens=1000
-                )
-                
-                response_text = response.choices[0].message.content.strip()
-                
-                # Clean up response and parse JSON
-                if response_text.startswith('```json'):
-                    response_text = response_text[7:-3].strip()
-                elif response_text.startswith('```'):
-                    response_text = response_text[3:-3].strip()
-                
-                return json.loads(response_text)
+                # The SDK call blocks, so keep it off the event loop
+                return await asyncio.to_thread(self._complete_actions, vlm, context)
             else:
                 # Fallback for other providers
                 return self._get_default_actions({}, [])
                 
         except Exception as e:
-            self.logger.error(f"LLM call failed: {e}")
+            self.logger.error("LLM call failed: %s", e)
             return self._get_default_actions({}, [])
     
+    def _complete_actions(self, vlm: 'VLMProcessor', context: str) -> Dict[str, Any]:
+        """Ask the OpenAI model for actions, answering repeated requests from the response cache."""
+        messages = [
+            {"role": "system", "content": _ACTIONS_SYSTEM_PROMPT},
+            {"role": "user", "content": context}
+        ]
+        
+        # The context holds the tool names, OCR and VLM excerpts and custom prompt,
+        # so an identical request gets an identical recommendation
+        cache = get_response_cache()
+        key = None
+        if cache is not None:
+            key = make_key(provider=vlm.provider.value, model=vlm.model, messages=messages,
+                           temperature=0.3, max_tokens=1000)
+            cached = cache.get(key)
+            if cached is not None:
+                self.logger.debug("Using cached LLM actions")
+                return _parse_json_reply(cached)
+        
+        response = vlm.openai_client.chat.completions.create(
+            model=vlm.model,
+            messages=messages,
+            temperature=0.3,
+            max_tokens=1000,
+            # JSON mode: the reply is a bare JSON object, without code fences
+            response_format={"type": "json_object"}
+        )
+        
+        response_text = response.choices[0].message.content
+        actions = _parse_json_reply(response_text)
+        # Only replies that parsed are cached
+        if key is not None:
+            cache.put(key, response_text)
+        return actions
+    
     def _get_default_actions(self, data: Dict[str, Any], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Get default actions when LLM is not available."""
         return {
@@ -834,18 +1242,18 @@ Respond with a JSON object containing:
         custom_prompt = data.get("custom_prompt", "")
         if custom_prompt:
             # Extract key terms from custom prompt
-            import re
-            key_terms = re.findall(r'\b[A-Za-z]{3,}\b', custom_prompt.lower())
+            key_terms = _KEY_TERM_RE.findall(custom_prompt.lower())
             key_terms = list(set(key_terms))[:5]  # Limit to 5 unique terms
             
+            # Lowercase the texts once rather than once per term
+            ocr_lower = (data.get("ocr_text") or "").lower()
+            vlm_lower = (data.get("vlm_description") or "").lower()
+            
             for term in key_terms:
-                ocr_text = data.get("ocr_text", "")
-                vlm_desc = data.get("vlm_description", "")
-                
                 found_in = []
-                if term in ocr_text.lower():
+                if term in ocr_lower:
                     found_in.append("OCR")
-                if term in vlm_desc.lower():
+                if term in vlm_lower:
                     found_in.append("VLM")
                 
                 if found_in:
@@ -867,41 +1275,51 @@ Respond with a JSON object containing:
         
         return analysis
     
-    def _has_tool(self, tools: List[Dict[str, Any]], tool_name: str) -> bool:
-        """Check if a specific tool is available."""
-        return any(tool.get("name") == tool_name for tool in tools)
+    async def _call_tools_batch(self, session: MCPSession, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Call several MCP tools with one write, then wait for all the responses.
+        
+        Args:
+            session: MCP server session
+            calls: (tool name, arguments) for each call
+            
+        Returns:
+            The result (or {"error": ...}) of each call, in the order of calls
+        """
+        if len(calls) == 1 or not self._pipeline_tool_calls:
+            return [await self._call_tool(session, *call) for call in calls]
+        
+        try:
+            responses = await session.request_many([
+                ("tools/call", {"name": tool_name, "arguments": arguments})
+                for tool_name, arguments in calls
+            ], self.call_timeout)
+        except Exception as e:
+            responses = [e] * len(calls)
+        
+        return [self._tool_result(tool_name, response) for (tool_name, _), response in zip(calls, responses)]
     
-    async def _call_tool(self, process, tool_id: int, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    async def _call_tool(self, session: MCPSession, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Call a specific MCP tool."""
         try:
-            # Create tool call request
-            tool_request = {
-                "jsonrpc": "2.0",
-                "id": tool_id,
-                "method": "tools/call",
-                "params": {
-                    "name": tool_name,
-                    "arguments": arguments
-                }
-            }
-            
-            # Send request
-            process.stdin.write((json.dumps(tool_request) + '\n').encode())
-            await process.stdin.drain()
-            
-            # Read response
-            response_line = await process.stdout.readline()
-            response = json.loads(response_line.decode().strip())
-            
-            if "error" in response:
-                self.logger.error(f"Tool {tool_name} returned error: {response['error']}")
-                return {"error": response["error"]}
-            
-            return response.get("result", {})
-            
+            response = await session.request("tools/call", {
+                "name": tool_name,
+                "arguments": arguments
+            }, self.call_timeout)
         except Exception as e:
-            self.logger.error(f"Failed to call tool {tool_name}: {e}")
-            return {"error": str(e)}
+            response = e
+        return self._tool_result(tool_name, response)
+    
+    def _tool_result(self, tool_name: str, response: Any) -> Dict[str, Any]:
+        """The result of a tools/call response, or {"error": ...} if the call failed."""
+        if isinstance(response, BaseException):
+            self.logger.error("Failed to call tool %s: %s", tool_name, response)
+            return {"error": str(response)}
+        
+        if "error" in response:
+            self.logger.error("Tool %s returned error: %s", tool_name, response['error'])
+            return {"error": response["error"]}
+        
+        return response.get("result", {})
     
     def _analyze_screenshot_content(self, data: Dict[str, Any]) -> List[List[str]]:
         """Analyze screenshot content and extract key information."""
@@ -915,33 +1333,30 @@ Respond with a JSON object containing:
         # Analyze OCR text for common patterns
         if ocr_text:
             # Look for URLs
-            import re
-            urls = re.findall(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', ocr_text)
-            for url in urls:
+            for url in _URL_RE.findall(ocr_text):
                 analysis.append(["URL", url, "OCR"])
             
             # Look for email addresses
-            emails = re.findall(r'\\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\\.[A-Z|a-z]{2,}\\b', ocr_text)
-            for email in emails:
+            for email in _EMAIL_RE.findall(ocr_text):
                 analysis.append(["Email", email, "OCR"])
             
-            # Look for common technology terms
-            tech_terms = ["API", "HTML", "CSS", "JavaScript", "Python", "React", "Vue", "Angular", "Node.js", 
-                         "Docker", "Kubernetes", "AWS", "Azure", "GCP", "database", "SQL", "JSON", "XML"]
-            for term in tech_terms:
-                if term.lower() in ocr_text.lower():
+            # Look for common technology terms, all in one pass over the text
+            found_terms = {match.lower() for match in _TECH_TERM_RE.findall(ocr_text)}
+            for term in TECH_TERMS:
+                if term.lower() in found_terms:
                     analysis.append(["Technology", term, "OCR"])
         
         # Analyze VLM description for content insights
         if vlm_description:
             # Extract key phrases from VLM description
-            if "browser" in vlm_description.lower() or "chrome" in vlm_description.lower():
+            vlm_lower = vlm_description.lower()
+            if "browser" in vlm_lower or "chrome" in vlm_lower:
                 analysis.append(["Application", "Web Browser", "VLM"])
             
-            if "code" in vlm_description.lower() or "programming" in vlm_description.lower():
+            if "code" in vlm_lower or "programming" in vlm_lower:
                 analysis.append(["Content Type", "Code/Programming", "VLM"])
             
-            if "dashboard" in vlm_description.lower() or "interface" in vlm_description.lower():
+            if "dashboard" in vlm_lower or "interface" in vlm_lower:
                 analysis.append(["Content Type", "User Interface", "VLM"])
         
         # If no specific analysis found, add general content info
@@ -965,3 +1380,20 @@ Respond with a JSON object containing:
     def list_servers(self) -> List[str]:
         """List all configured MCP server names."""
         return list(self.servers.keys())
+
+
+_shared_client: Optional[MCPClient] = None
+_shared_client_lock = threading.Lock()
+
+
+def get_mcp_client() -> MCPClient:
+    """Shared MCP client, created on first use and kept until it is closed.
+    
+    Building a client loads the server configs, the mcp-use config file and the LLM
+    client, so callers reuse one instance instead of constructing their own.
+    """
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = MCPClient()
+        return _shared_client
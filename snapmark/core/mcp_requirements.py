@@ -1,10 +1,30 @@
 """MCP dependency management and validation."""
 
+import importlib.util
 import logging
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 
 logger = logging.getLogger(__name__)
 
+# Module name -> package name of the optional MCP dependencies
+MCP_PACKAGES = {
+    'mcp_use': 'mcp-use',
+    'langchain_openai': 'langchain-openai',
+    'langchain_ollama': 'langchain-ollama',
+}
+
+_status_logged = False
+
+
+@lru_cache(maxsize=None)
+def _is_installed(module: str) -> bool:
+    """Check whether a module is installed, without importing it."""
+    try:
+        return importlib.util.find_spec(module) is not None
+    except (ImportError, ValueError):
+        return False
+
 
 def check_mcp_dependencies() -> Dict[str, any]:
     """Check availability of MCP-related dependencies.
@@ -22,32 +42,14 @@ def check_mcp_dependencies() -> Dict[str, any]:
         'warnings': []
     }
     
-    # Check mcp-use
-    try:
-        import mcp_use
-        results['mcp_use_available'] = True
-        logger.debug("mcp-use library is available")
-    except ImportError as e:
-        results['errors'].append(f"mcp-use not available: {e}")
-        logger.warning(f"mcp-use import failed: {e}")
-    
-    # Check langchain-openai
-    try:
-        import langchain_openai
-        results['langchain_openai_available'] = True
-        logger.debug("langchain-openai library is available")
-    except ImportError as e:
-        results['errors'].append(f"langchain-openai not available: {e}")
-        logger.warning(f"langchain-openai import failed: {e}")
-    
-    # Check langchain-ollama
-    try:
-        import langchain_ollama
-        results['langchain_ollama_available'] = True
-        logger.debug("langchain-ollama library is available")
-    except ImportError as e:
-        results['errors'].append(f"langchain-ollama not available: {e}")
-        logger.warning(f"langchain-ollama import failed: {e}")
+    # Check the optional packages
+    for module, package in MCP_PACKAGES.items():
+        if _is_installed(module):
+            results[f'{module}_available'] = True
+            logger.debug(f"{package} library is available")
+        else:
+            results['errors'].append(f"{package} not available: No module named '{module}'")
+            logger.warning(f"{package} is not installed")
     
     # Check OpenAI or Ollama configuration
     try:
@@ -73,24 +75,7 @@ def get_missing_dependencies() -> List[str]:
     Returns:
         List of missing package names
     """
-    missing = []
-    
-    try:
-        import mcp_use
-    except ImportError:
-        missing.append("mcp-use")
-    
-    try:
-        import langchain_openai
-    except ImportError:
-        missing.append("langchain-openai")
-    
-    try:
-        import langchain_ollama
-    except ImportError:
-        missing.append("langchain-ollama")
-    
-    return missing
+    return [package for module, package in MCP_PACKAGES.items() if not _is_installed(module)]
 
 
 def validate_mcp_setup() -> Tuple[bool, List[str]]:
@@ -124,8 +109,13 @@ def validate_mcp_setup() -> Tuple[bool, List[str]]:
     return len(issues) == 0, issues
 
 
-def log_mcp_status():
-    """Log current MCP integration status."""
+def log_mcp_status(force: bool = False):
+    """Log current MCP integration status, once per process unless forced."""
+    global _status_logged
+    if _status_logged and not force:
+        return
+    _status_logged = True
+    
     status = check_mcp_dependencies()
     
     if status['mcp_use_available'] and (status['langchain_openai_available'] or status['langchain_ollama_available']):
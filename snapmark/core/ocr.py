@@ -1,47 +1,209 @@
+import io
+import os
+import atexit
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
 import pytesseract
 from PIL import Image
-from typing import Optional
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+TESSERACT_CONFIG = '--oem 3 --psm 6'
+
+# OCR results kept per (file, modification time, language)
+OCR_CACHE_SIZE = 32
+
+# tesserocr engines kept per language, and so OCR calls run at once; one per
+# background worker (background.MAX_WORKERS)
+ENGINE_POOL_SIZE = 2
+
+
+class _EnginePool:
+    """tesserocr engines shared between threads, at most `size` per language.
+    
+    An engine is not thread-safe, so each is lent to one caller at a time; its
+    language data stays loaded between calls.
+    """
+    
+    def __init__(self, size: int):
+        self.size = size
+        self._cond = threading.Condition()
+        self._idle: Dict[str, List] = {}
+        self._count: Dict[str, int] = {}
+        # Engines lent out when close() ran, ended as soon as they come back
+        self._retired: Set[Any] = set()
+        self._lent: Dict[Any, str] = {}
+    
+    @contextmanager
+    def engine(self, lang: str) -> Iterator:
+        api = self._acquire(lang)
+        try:
+            yield api
+        finally:
+            self._release(lang, api)
+    
+    def _acquire(self, lang: str):
+        with self._cond:
+            while True:
+                idle = self._idle.get(lang)
+                if idle:
+                    api = idle.pop()
+                    self._lent[api] = lang
+                    return api
+                if self._count.get(lang, 0) < self.size:
+                    self._count[lang] = self._count.get(lang, 0) + 1
+                    break
+                self._cond.wait()
+        
+        # Loading language data is slow, so new engines are made outside the lock
+        try:
+            # Same settings as TESSERACT_CONFIG
+            api = tesserocr.PyTessBaseAPI(lang=lang, psm=tesserocr.PSM.SINGLE_BLOCK, oem=tesserocr.OEM.DEFAULT)
+        except BaseException:
+            with self._cond:
+                self._count[lang] -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._lent[api] = lang
+        return api
+    
+    def _release(self, lang: str, api):
+        with self._cond:
+            del self._lent[api]
+            if api in self._retired:
+                self._retired.discard(api)
+                api.End()
+            else:
+                self._idle.setdefault(lang, []).append(api)
+            self._cond.notify()
+    
+    def close(self):
+        """End idle engines now and lent ones when they are returned; later calls start new ones."""
+        with self._cond:
+            for lang, idle in self._idle.items():
+                for api in idle:
+                    api.End()
+                self._count[lang] -= len(idle)
+            self._idle.clear()
+            for api, lang in self._lent.items():
+                if api not in self._retired:
+                    self._retired.add(api)
+                    self._count[lang] -= 1
+            self._cond.notify_all()
+
+
+_engines = _EnginePool(ENGINE_POOL_SIZE)
+
+
+@atexit.register
+def close_engines():
+    """Release the tesserocr engines and their loaded language data."""
+    _engines.close()
+
+
+class _OCRResult(NamedTuple):
+    """Everything one recognition pass yields, so text and confidence share it."""
+    text: str
+    words: Tuple[str, ...]
+    confidences: Tuple[float, ...]
+
+
+def _recognize(image: Image.Image, lang: str) -> _OCRResult:
+    """Run OCR once, returning the page text and the recognized words with their confidences."""
+    words = []
+    confidences = []
+    
+    if tesserocr:
+        with _engines.engine(lang) as api:
+            api.SetImage(image)
+            api.Recognize()
+            # Both read the results of the Recognize() above rather than recognizing again
+            text = api.GetUTF8Text()
+            level = tesserocr.RIL.WORD
+            for word_it in tesserocr.iterate_level(api.GetIterator(), level):
+                word = word_it.GetUTF8Text(level)
+                if word and word.strip():
+                    words.append(word)
+                    confidences.append(word_it.Confidence(level))
+        return _OCRResult(text, tuple(words), tuple(confidences))
+    
+    data = pytesseract.image_to_data(
+        image,
+        lang=lang,
+        config=TESSERACT_CONFIG,
+        output_type=pytesseract.Output.DICT
+    )
+    # Rebuild the text the way image_to_string lays it out: words joined by spaces,
+    # lines by newlines and paragraphs by blank lines
+    parts = []
+    current_line = None
+    for i, word in enumerate(data['text']):
+        if not word.strip():
+            continue
+        line = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        if line == current_line:
+            parts.append(' ')
+        elif current_line is not None:
+            parts.append('\n' if line[:2] == current_line[:2] else '\n\n')
+        current_line = line
+        parts.append(word)
+        words.append(word)
+        confidences.append(float(data['conf'][i]))
+    return _OCRResult(''.join(parts), tuple(words), tuple(confidences))
+
+
+@lru_cache(maxsize=OCR_CACHE_SIZE)
+def _file_to_result(image_path: str, mtime_ns: int, lang: str) -> _OCRResult:
+    with Image.open(image_path) as image:
+        return _recognize(image, lang)
 
 
 class OCRProcessor:
+    # Set once Tesseract has been found, so later instances skip the version check
+    _tesseract_found = False
+    
     def __init__(self, lang: str = 'eng+chi_tra+chi_sim'):
         self.lang = lang
-        try:
-            pytesseract.get_tesseract_version()
-        except pytesseract.TesseractNotFoundError:
-            raise RuntimeError("Tesseract OCR not found. Please install Tesseract OCR.")
+        # tesserocr links libtesseract directly and doesn't need the executable
+        if not OCRProcessor._tesseract_found and not tesserocr:
+            try:
+                pytesseract.get_tesseract_version()
+            except pytesseract.TesseractNotFoundError:
+                raise RuntimeError("Tesseract OCR not found. Please install Tesseract OCR.")
+            OCRProcessor._tesseract_found = True
     
-    def extract_text(self, image_path: str, lang: Optional[str] = None) -> str:
+    def _open_image(self, image_path: str, image_data: Optional[bytes] = None) -> Image.Image:
+        # Use already loaded image bytes when the caller has them
+        if image_data is not None:
+            return Image.open(io.BytesIO(image_data))
+        return Image.open(image_path)
+    
+    def _ocr(self, image_path: str, lang: Optional[str], image_data: Optional[bytes]) -> _OCRResult:
+        if image_data is None:
+            # Repeated calls for an unchanged file reuse the earlier result, whichever
+            # of the methods below made them
+            return _file_to_result(image_path, os.stat(image_path).st_mtime_ns, lang or self.lang)
+        return _recognize(self._open_image(image_path, image_data), lang or self.lang)
+    
+    def extract_text(self, image_path: str, lang: Optional[str] = None,
+                     image_data: Optional[bytes] = None) -> str:
         try:
-            image = Image.open(image_path)
-            text = pytesseract.image_to_string(
-                image, 
-                lang=lang or self.lang,
-                config='--oem 3 --psm 6'
-            )
-            return text.strip()
+            return self._ocr(image_path, lang, image_data).text.strip()
         except Exception as e:
             return f"OCR Error: {str(e)}"
     
-    def extract_text_with_confidence(self, image_path: str, lang: Optional[str] = None) -> tuple[str, float]:
+    def extract_text_with_confidence(self, image_path: str, lang: Optional[str] = None,
+                                     image_data: Optional[bytes] = None) -> tuple[str, float]:
         try:
-            image = Image.open(image_path)
-            data = pytesseract.image_to_data(
-                image,
-                lang=lang or self.lang,
-                config='--oem 3 --psm 6',
-                output_type=pytesseract.Output.DICT
-            )
-            
-            text_parts = []
-            confidences = []
-            
-            for i, word in enumerate(data['text']):
-                if word.strip():
-                    text_parts.append(word)
-                    confidences.append(data['conf'][i])
+            _, words, confidences = self._ocr(image_path, lang, image_data)
             
-            text = ' '.join(text_parts)
+            text = ' '.join(words)
             avg_confidence = sum(confidences) / len(confidences) if confidences else 0
             
             return text, avg_confidence
@@ -50,4 +212,4 @@ class OCRProcessor:
     
     def is_text_detected(self, image_path: str, threshold: float = 30.0) -> bool:
         _, confidence = self.extract_text_with_confidence(image_path)
-        return confidence > threshold
\ No newline at end of file
+        return confidence > threshold
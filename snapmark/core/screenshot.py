@@ -1,6 +1,6 @@
 import os
 import time
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
 from typing import Optional, Tuple
 
@@ -11,21 +11,64 @@ from PIL import Image
 class ScreenshotCapture:
     def __init__(self, output_dir: str = "SnapMarkData"):
         self.output_dir = Path(output_dir)
+        # Today's directory, created once per day rather than on every capture
+        self._date_path: Optional[Tuple[date, Path]] = None
         self._ensure_output_dir()
     
-    def _ensure_output_dir(self):
-        now = datetime.now()
+    def _ensure_output_dir(self, now: Optional[datetime] = None) -> Path:
+        now = now or datetime.now()
+        today = now.date()
+        if self._date_path is not None and self._date_path[0] == today:
+            return self._date_path[1]
+        
         date_path = self.output_dir / str(now.year) / f"{now.month:02d}" / f"{now.day:02d}"
         date_path.mkdir(parents=True, exist_ok=True)
+        self._date_path = (today, date_path)
         return date_path
     
-    def capture_screen(self, region: Optional[Tuple[int, int, int, int]] = None) -> str:
-        timestamp = datetime.now().strftime("%H-%M-%S")
-        filename = f"screen_{timestamp}.png"
+    def _reserve_path(self, now: datetime, extension: str) -> Path:
+        """Create an empty file under a name no other capture has, adding -1, -2, ... if needed.
+        
+        Captures can run concurrently, and two in the same second would otherwise
+        write (and generate notes for) the same file.
+        """
+        stem = f"screen_{now.strftime('%H-%M-%S')}"
+        counter = 0
+        while True:
+            suffix = f"-{counter}" if counter else ""
+            filepath = self._ensure_output_dir(now) / f"{stem}{suffix}.{extension}"
+            try:
+                # Exclusive create, so the check and the claim are one step
+                with open(filepath, 'xb'):
+                    return filepath
+            except FileExistsError:
+                counter += 1
+            except FileNotFoundError:
+                # Day directory removed while the app was running
+                self._date_path = None
+    
+    def capture_screen(
+        self,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        image_format: str = "png",
+        quality: int = 85
+    ) -> str:
+        image_format = image_format.lower()
+        extension = "jpg" if image_format in ("jpeg", "jpg") else "png"
+        
+        # One clock read, so the file name and its day directory always agree
+        filepath = self._reserve_path(datetime.now(), extension)
         
-        date_path = self._ensure_output_dir()
-        filepath = date_path / filename
+        try:
+            self._grab(filepath, region, extension, quality)
+        except BaseException:
+            filepath.unlink(missing_ok=True)
+            raise
         
+        return str(filepath)
+    
+    def _grab(self, filepath: Path, region: Optional[Tuple[int, int, int, int]],
+              extension: str, quality: int):
         with mss.mss() as sct:
             if region:
                 monitor = {"top": region[1], "left": region[0], 
@@ -35,9 +78,11 @@ class ScreenshotCapture:
             
             screenshot = sct.grab(monitor)
             img = Image.frombytes("RGB", screenshot.size, screenshot.bgra, "raw", "BGRX")
-            img.save(str(filepath))
-        
-        return str(filepath)
+            if extension == "jpg":
+                img.save(str(filepath), format="JPEG", quality=quality)
+            else:
+                # Lossless for OCR; low compression level is much faster to write
+                img.save(str(filepath), format="PNG", compress_level=1)
     
     def capture_window(self) -> str:
         return self.capture_screen()
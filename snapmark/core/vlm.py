@@ -1,5 +1,5 @@
 import os
-import base64
+import mimetypes
 import requests
 from pathlib import Path
 from typing import Optional, Dict, Any
@@ -7,6 +7,14 @@ from PIL import Image
 import io
 from enum import Enum
 
+try:
+    # SIMD-accelerated base64 for large screenshot payloads
+    from pybase64 import b64encode
+except ImportError:
+    from base64 import b64encode
+
+from ._ai_http import get_openai_client, get_azure_openai_client, get_ollama_session
+
 
 class VLMProvider(Enum):
     OLLAMA = "ollama"
@@ -53,7 +61,7 @@ class VLMProcessor:
             if not api_key:
                 raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY environment variable or configure in vlm.openai_api_key")
             
-            self.openai_client = OpenAI(api_key=api_key)
+            self.openai_client = get_openai_client(api_key)
                 
         except ImportError:
             raise ImportError("OpenAI package not installed. Run: uv add openai")
@@ -71,23 +79,30 @@ class VLMProcessor:
             if not api_key or not endpoint:
                 raise ValueError("Azure OpenAI API key and endpoint required. Set environment variables or configure in config")
             
-            self.azure_client = AzureOpenAI(
-                api_key=api_key,
-                azure_endpoint=endpoint,
-                api_version=api_version
-            )
+            self.azure_client = get_azure_openai_client(api_key, endpoint, api_version)
                 
         except ImportError:
             raise ImportError("OpenAI package not installed. Run: uv add openai")
         
-    def encode_image_to_base64(self, image_path: str) -> str:
+    def encode_image_to_base64(self, image_path: str, image_data: Optional[bytes] = None) -> str:
         """Convert image to base64 string for API call"""
+        if image_data is not None:
+            return b64encode(image_data).decode('utf-8')
         with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
+            return b64encode(image_file.read()).decode('utf-8')
     
-    def describe_image(self, image_path: str, prompt: Optional[str] = None) -> str:
-        """Generate description of image using VLM"""
-        if not Path(image_path).exists():
+    @staticmethod
+    def image_mime_type(image_path: str) -> str:
+        """MIME type of the screenshot, from its extension"""
+        return mimetypes.guess_type(image_path)[0] or "image/png"
+    
+    def describe_image(self, image_path: str, prompt: Optional[str] = None,
+                       image_data: Optional[bytes] = None) -> str:
+        """Generate description of image using VLM.
+        
+        ``image_data`` may hold the already loaded image bytes to avoid reading the file again.
+        """
+        if image_data is None and not Path(image_path).exists():
             return f"Error: Image file not found at {image_path}"
         
         if not prompt:
@@ -95,22 +110,22 @@ class VLMProcessor:
         
         try:
             if self.provider == VLMProvider.OLLAMA:
-                return self._describe_image_ollama(image_path, prompt)
+                return self._describe_image_ollama(image_path, prompt, image_data)
             elif self.provider == VLMProvider.OPENAI:
-                return self._describe_image_openai(image_path, prompt)
+                return self._describe_image_openai(image_path, prompt, image_data)
             elif self.provider == VLMProvider.AZURE_OPENAI:
-                return self._describe_image_azure(image_path, prompt)
+                return self._describe_image_azure(image_path, prompt, image_data)
             else:
                 return f"Error: Unsupported VLM provider: {self.provider}"
                 
         except Exception as e:
             return f"Error generating image description: {str(e)}"
     
-    def _describe_image_ollama(self, image_path: str, prompt: str) -> str:
+    def _describe_image_ollama(self, image_path: str, prompt: str, image_data: Optional[bytes] = None) -> str:
         """Generate description using Ollama"""
         try:
             # Encode image to base64
-            base64_image = self.encode_image_to_base64(image_path)
+            base64_image = self.encode_image_to_base64(image_path, image_data)
             # Prepare the request payload
             payload = {
                 "model": self.model,
@@ -120,7 +135,7 @@ class VLMProcessor:
             }
             
             # Make API call to Ollama
-            response = requests.post(
+            response = get_ollama_session().post(
                 f"{self.api_url}/api/generate",
                 json=payload,
                 headers={"Content-Type": "application/json"},
@@ -138,14 +153,14 @@ class VLMProcessor:
         except requests.exceptions.Timeout:
             return "Error: Request timed out. The model might be loading."
     
-    def _describe_image_openai(self, image_path: str, prompt: str) -> str:
+    def _describe_image_openai(self, image_path: str, prompt: str, image_data: Optional[bytes] = None) -> str:
         """Generate description using OpenAI"""
         if not self.openai_client:
             return "Error: OpenAI client not initialized"
         
         try:
             # Encode image to base64
-            base64_image = self.encode_image_to_base64(image_path)
+            base64_image = self.encode_image_to_base64(image_path, image_data)
             
             response = self.openai_client.chat.completions.create(
                 model=self.model,
@@ -157,7 +172,7 @@ class VLMProcessor:
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
+                                    "url": f"data:{self.image_mime_type(image_path)};base64,{base64_image}"
                                 }
                             }
                         ]
@@ -171,14 +186,14 @@ class VLMProcessor:
         except Exception as e:
             return f"OpenAI API Error: {str(e)}"
     
-    def _describe_image_azure(self, image_path: str, prompt: str) -> str:
+    def _describe_image_azure(self, image_path: str, prompt: str, image_data: Optional[bytes] = None) -> str:
         """Generate description using Azure OpenAI"""
         if not self.azure_client:
             return "Error: Azure OpenAI client not initialized"
         
         try:
             # Encode image to base64
-            base64_image = self.encode_image_to_base64(image_path)
+            base64_image = self.encode_image_to_base64(image_path, image_data)
             
             response = self.azure_client.chat.completions.create(
                 model=self.model,
@@ -190,7 +205,7 @@ class VLMProcessor:
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
+                                    "url": f"data:{self.image_mime_type(image_path)};base64,{base64_image}"
                                 }
                             }
                         ]
@@ -238,7 +253,7 @@ class VLMProcessor:
         """Check if the VLM service is available"""
         try:
             if self.provider == VLMProvider.OLLAMA:
-                response = requests.get(f"{self.api_url}/api/tags", timeout=5)
+                response = get_ollama_session().get(f"{self.api_url}/api/tags", timeout=5)
                 if response.status_code == 200:
                     tags = response.json()
                     models = [model["name"] for model in tags.get("models", [])]
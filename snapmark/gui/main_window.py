@@ -17,6 +17,7 @@ from ..core.screenshot import ScreenshotCapture
 from ..core.ocr import OCRProcessor
 from ..core.markdown_generator import MarkdownGenerator
 from ..core.hotkey import HotkeyManager
+from ..utils.search import find_note_image
 
 
 class ScreenshotWorker(QThread):
@@ -200,8 +201,8 @@ class MainWindow(QMainWindow):
             self.content_text.setPlainText(content)
             
             # Load image
-            img_path = date_path / f"{note_name}.png"
-            if img_path.exists():
+            img_path = find_note_image(md_path)
+            if img_path:
                 pixmap = QPixmap(str(img_path))
                 if not pixmap.isNull():
                     scaled_pixmap = pixmap.scaled(
@@ -3,6 +3,7 @@ import io
 import os
 import sys
 import asyncio
+import threading
 from pathlib import Path
 from PIL import Image, ImageDraw
 import base64
@@ -20,8 +21,8 @@ try:
     from snapmark.core.markdown_generator import MarkdownGenerator
     from snapmark.core.ai_summary import AISummaryGenerator
     from snapmark.core.ai_chat import AIChatProcessor
-    from snapmark.core.mcp_client import MCPClient
-    from snapmark.utils.search import SearchEngine, FileManager
+    from snapmark.core.mcp_client import get_mcp_client
+    from snapmark.utils.search import SearchEngine, FileManager, IMAGE_SUFFIXES, find_note_image
     from snapmark.config import Config
 except ImportError:
     # Fallback for relative imports
@@ -31,8 +32,8 @@ except ImportError:
     from ..core.markdown_generator import MarkdownGenerator
     from ..core.ai_summary import AISummaryGenerator
     from ..core.ai_chat import AIChatProcessor
-    from ..core.mcp_client import MCPClient
-    from ..utils.search import SearchEngine, FileManager
+    from ..core.mcp_client import get_mcp_client
+    from ..utils.search import SearchEngine, FileManager, IMAGE_SUFFIXES, find_note_image
     from ..config import Config
 
 
@@ -54,7 +55,7 @@ def init_session_state():
             'md_gen': MarkdownGenerator(),
             'ai_summary': AISummaryGenerator(),
             'ai_chat': None,  # Initialize lazily when needed
-            'mcp': MCPClient(),
+            'mcp': get_mcp_client(),
             'search': SearchEngine(),
             'file_manager': FileManager()
         }
@@ -113,7 +114,8 @@ def add_red_frame_annotation(image_path, x1, y1, x2, y2):
     draw.rectangle([x1, y1, x2, y2], outline="red", width=3)
     
     # Save annotated image
-    annotated_path = image_path.replace(".png", "_annotated.png")
+    path = Path(image_path)
+    annotated_path = str(path.with_name(f"{path.stem}_annotated{path.suffix}"))
     img.save(annotated_path)
     return annotated_path
 
@@ -146,7 +148,7 @@ def get_background_service_status():
         today_files = file_manager.get_recent_files(days=1)
         
         # Count screenshots taken today
-        screenshot_count = len([f for f in today_files if f.suffix == '.png'])
+        screenshot_count = len([f for f in today_files if f.suffix in IMAGE_SUFFIXES])
         
         # Get uptime
         uptime = datetime.now() - st.session_state.background_service_start_time
@@ -155,7 +157,7 @@ def get_background_service_status():
         # Get last screenshot time
         last_screenshot_time = None
         if today_files:
-            png_files = [f for f in today_files if f.suffix == '.png']
+            png_files = [f for f in today_files if f.suffix in IMAGE_SUFFIXES]
             if png_files:
                 latest_file = max(png_files, key=lambda x: x.stat().st_mtime)
                 last_screenshot_time = datetime.fromtimestamp(latest_file.stat().st_mtime)
@@ -188,8 +190,8 @@ def check_for_new_screenshots():
             # Check if it's newer than our last check
             if latest_time > st.session_state.last_check_time:
                 # Try to find corresponding image
-                image_path = latest_file.with_suffix('.png')
-                if image_path.exists() and str(image_path) != st.session_state.auto_loaded_screenshot:
+                image_path = find_note_image(latest_file)
+                if image_path and str(image_path) != st.session_state.auto_loaded_screenshot:
                     st.session_state.current_image_path = str(image_path)
                     st.session_state.current_image = Image.open(image_path)
                     st.session_state.auto_loaded_screenshot = str(image_path)
@@ -206,7 +208,15 @@ def check_for_new_screenshots():
         return False
 
 
-async def process_with_ai_chat(message, image_path=None, provider=None, model=None):
+@st.cache_resource
+def get_chat_event_loop():
+    """Event loop shared by all chat requests, so async AI clients keep their connections"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True, name="snapmark-chat").start()
+    return loop
+
+
+def process_with_ai_chat(message, image_path=None, provider=None, model=None):
     """Process message with AI chat"""
     try:
         chat_processor = get_ai_chat_processor(provider, model)
@@ -229,8 +239,12 @@ async def process_with_ai_chat(message, image_path=None, provider=None, model=No
             if vlm_processor.is_available():
                 context['vlm_description'] = vlm_processor.describe_image(image_path)
         
-        response = await chat_processor.process_message(message, context)
-        return response
+        # Session state is only usable on the script thread, so only the request
+        # itself runs on the shared loop
+        future = asyncio.run_coroutine_threadsafe(
+            chat_processor.process_message(message, context), get_chat_event_loop()
+        )
+        return future.result()
     except Exception as e:
         return f"Error: {str(e)}"
 
@@ -445,13 +459,9 @@ def main():
                         else:
                             provider = "ollama"
                         
-                        # Use asyncio to run the async function
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        response = loop.run_until_complete(
-                            process_with_ai_chat(prompt, st.session_state.current_image_path, provider, selected_model)
+                        response = process_with_ai_chat(
+                            prompt, st.session_state.current_image_path, provider, selected_model
                         )
-                        loop.close()
                     
                     # Add AI response to chat history
                     st.session_state.chat_messages.append({"role": "assistant", "content": response})
@@ -670,7 +680,7 @@ def main():
                 # Display sessions
                 for timestamp, files in list(sessions.items())[:5]:  # Show last 5 sessions
                     # Find the PNG file for this session
-                    png_file = next((f for f in files if f.suffix == '.png'), None)
+                    png_file = next((f for f in files if f.suffix in IMAGE_SUFFIXES), None)
                     if png_file:
                         col1, col2, col3 = st.columns([2, 3, 1])
                         with col1:
@@ -710,8 +720,8 @@ def main():
                     with col_file_2:
                         if st.button(f"Load", key=f"load_{file_path.name}"):
                             # Try to find corresponding image
-                            image_path = file_path.with_suffix('.png')
-                            if image_path.exists():
+                            image_path = find_note_image(file_path)
+                            if image_path:
                                 st.session_state.current_image_path = str(image_path)
                                 st.session_state.current_image = Image.open(image_path)
                                 st.rerun()
@@ -22,7 +22,7 @@ from .core.ocr import OCRProcessor
 from .core.vlm import VLMProcessor
 from .core.markdown_generator import MarkdownGenerator
 from .core.ai_summary import AISummaryGenerator
-from .core.mcp_client import MCPClient
+from .core.mcp_client import get_mcp_client
 from .utils.search import SearchEngine, FileManager
 from .utils.scheduler import TaskScheduler
 
@@ -41,6 +41,7 @@ def create_cli_parser():
     # Background service command
     bg_parser = subparsers.add_parser('background', help='Run background service with global hotkeys only')
     bg_parser.add_argument('--output', type=str, help='Output directory')
+    bg_parser.add_argument('--verbose', action='store_true', help='Log per-screenshot progress')
     
     # Screenshot command
     screenshot_parser = subparsers.add_parser('screenshot', help='Take screenshot')
@@ -128,7 +129,7 @@ def cmd_screenshot(args):
         
         # Process with MCP servers if requested
         if args.mcp:
-            mcp_client = MCPClient()
+            mcp_client = get_mcp_client()
             if mcp_client.is_enabled():
                 print("Processing with MCP servers...")
                 try:
@@ -140,6 +141,7 @@ def cmd_screenshot(args):
                             image_path, md_path, ocr_text, vlm_description
                         )
                     )
+                    loop.run_until_complete(mcp_client.close())
                     loop.close()
                     
                     for server_name, result in mcp_results.items():
@@ -253,7 +255,7 @@ def cmd_vlm(args):
 
 
 def cmd_mcp(args):
-    mcp_client = MCPClient()
+    mcp_client = get_mcp_client()
     
     if args.mcp_action == 'list':
         servers = mcp_client.list_servers()
@@ -295,6 +297,7 @@ def cmd_mcp(args):
             result = loop.run_until_complete(
                 mcp_client._interact_with_server(server, test_data)
             )
+            loop.run_until_complete(mcp_client.close())
             loop.close()
             
             print(f"Test successful: {result}")
@@ -325,6 +328,7 @@ def cmd_mcp(args):
                     image_path, markdown_path, ocr_text, vlm_description
                 )
             )
+            loop.run_until_complete(mcp_client.close())
             loop.close()
             
             print("\nMCP Processing Results:")
@@ -427,7 +431,7 @@ def main():
                 sys.exit(app.exec_())
     
     elif args.command == 'background':
-        service = BackgroundService()
+        service = BackgroundService(verbose=args.verbose)
         if args.output:
             # Set custom output directory if provided
             service.capture = ScreenshotCapture(args.output)
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+
+class ResultCache:
+    """On-disk cache of OCR/VLM results keyed by the screenshot's content hash."""
+
+    def __init__(self, cache_dir: str, max_mb: float = 100):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        # Entry sizes by key, least recently used first; the directory is scanned
+        # once on first use and then kept up to date in memory
+        self._sizes: Optional["OrderedDict[str, int]"] = None
+        self._total = 0
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        """Hash the image bytes, using blake3 when installed."""
+        hasher = blake3.blake3() if blake3 else hashlib.sha256()
+        hasher.update(data)
+        return hasher.hexdigest()
+
+    @staticmethod
+    def hash_file(image_path: str) -> str:
+        """Hash an image file without loading it into memory at once."""
+        hasher = blake3.blake3() if blake3 else hashlib.sha256()
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            # Refresh mtime so eviction stays least-recently-used across restarts
+            os.utime(path)
+        except (OSError, json.JSONDecodeError):
+            return None
+        
+        with self._lock:
+            if self._sizes is not None and key in self._sizes:
+                self._sizes.move_to_end(key)
+        return entry
+    
+    def put(self, key: str, entry: Dict[str, Any]):
+        data = json.dumps(entry).encode('utf-8')
+        
+        # Write to a temp file and rename, so a worker storing the same hash at the
+        # same time never leaves a mixed or truncated entry
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{key}.", suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._entry_path(key))
+        except OSError as e:
+            print(f"Failed to write cache entry: {e}")
+            if tmp_path:
+                Path(tmp_path).unlink(missing_ok=True)
+            return
+        
+        with self._lock:
+            sizes = self._index()
+            self._total += len(data) - sizes.pop(key, 0)
+            sizes[key] = len(data)
+            self._evict()
+    
+    def _index(self) -> "OrderedDict[str, int]":
+        """Sizes of the entries on disk, oldest first. Call with the lock held."""
+        if self._sizes is None:
+            entries = []
+            for path in self.cache_dir.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path.stem, stat.st_size))
+            self._sizes = OrderedDict((key, size) for _, key, size in sorted(entries))
+            self._total = sum(self._sizes.values())
+        return self._sizes
+    
+    def _evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes. Call with the lock held."""
+        while self._total > self.max_bytes and self._sizes:
+            key, size = self._sizes.popitem(last=False)
+            self._entry_path(key).unlink(missing_ok=True)
+            self._total -= size
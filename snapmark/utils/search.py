@@ -6,6 +6,19 @@ from typing import List, Dict, Optional, Tuple
 import sqlite3
 
 
+# Screenshot extensions, for both storage.image_format values
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg')
+
+
+def find_note_image(md_path: Path) -> Optional[Path]:
+    """Return the screenshot saved next to a note, or None if there is none"""
+    for suffix in IMAGE_SUFFIXES:
+        img_path = md_path.with_suffix(suffix)
+        if img_path.exists():
+            return img_path
+    return None
+
+
 class SearchEngine:
     def __init__(self, data_dir: str = "SnapMarkData"):
         self.data_dir = Path(data_dir)
@@ -196,12 +209,12 @@ class FileManager:
     
     def delete_file_pair(self, md_path: Path) -> bool:
         try:
-            img_path = md_path.with_suffix('.png')
+            img_path = find_note_image(md_path)
             
             if md_path.exists():
                 md_path.unlink()
             
-            if img_path.exists():
+            if img_path:
                 img_path.unlink()
             
             return True
@@ -221,5 +234,5 @@ class FileManager:
             "total_files": total_files,
             "total_size_mb": round(total_size / (1024 * 1024), 2),
             "markdown_files": len(list(self.data_dir.rglob("*.md"))),
-            "image_files": len(list(self.data_dir.rglob("*.png")))
+            "image_files": sum(1 for f in self.data_dir.rglob("*") if f.suffix in IMAGE_SUFFIXES)
         }
\ No newline at end of file
@@ -12,7 +12,9 @@ def switch_vlm_provider(provider: str, model: Optional[str] = None, api_key: Opt
         model: Model name (e.g., 'gpt-4o' for OpenAI, 'llama3.2-vision' for Ollama)
         api_key: API key for OpenAI (optional, can be set via environment variable)
     """
-    config_path = Path.home() / '.snapmark2' / 'config.json'
+    from ..config import DEFAULT_CONFIG_FILE
+    
+    config_path = Path(DEFAULT_CONFIG_FILE)
     
     # Load existing config
     if config_path.exists():
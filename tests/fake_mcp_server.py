@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Minimal stdio MCP server used by test_mcp_session_pool.py
+
+Tools:
+    echo  - replies at once with its arguments
+    slow  - replies with its arguments after arguments["delay"] seconds, so replies
+            can come back in a different order from the requests
+    hang  - never replies
+    exit  - exits without replying, closing stdout
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+_lock = threading.Lock()
+
+
+def send(message):
+    with _lock:
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+
+
+def reply(request, result, delay=0.0):
+    if delay:
+        time.sleep(delay)
+    send({"jsonrpc": "2.0", "id": request["id"], "result": result})
+
+
+def main():
+    for line in sys.stdin:
+        request = json.loads(line)
+        if "id" not in request:
+            continue
+
+        method = request["method"]
+        if method == "initialize":
+            reply(request, {"capabilities": {}, "serverInfo": {"name": "fake", "pid": os.getpid()}})
+        elif method == "tools/list":
+            # Output the client must skip: a log line and a notification
+            with _lock:
+                sys.stdout.write("not json\n")
+            send({"jsonrpc": "2.0", "method": "notifications/message", "params": {}})
+            reply(request, {"tools": [{"name": name} for name in ("echo", "slow", "hang", "exit")]})
+        elif method == "tools/call":
+            name = request["params"]["name"]
+            arguments = request["params"].get("arguments", {})
+            if name == "echo":
+                reply(request, {"echo": arguments})
+            elif name == "slow":
+                threading.Thread(
+                    target=reply, args=(request, {"echo": arguments}, arguments.get("delay", 0.2))
+                ).start()
+            elif name == "exit":
+                os._exit(0)
+            # "hang" never replies
+        else:
+            send({"jsonrpc": "2.0", "id": request["id"], "error": {"code": -32601, "message": "unknown method"}})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Test the AI chat response cache
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from snapmark.core import ai_cache
+from snapmark.core.ai_cache import ExactLLMCache, SemanticCache, make_key
+from snapmark.core.ai_chat import AIChat
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    """Ollama chat (no API key needed) with a private cache and a counting fake provider"""
+    chat = AIChat(provider="ollama", model="llama3")
+    chat._response_cache = ExactLLMCache()
+    chat._semantic_cache = None
+    chat.replies = []
+    chat.calls = 0
+
+    def dispatch(message, image_path):
+        chat.calls += 1
+        return chat.replies.pop(0) if chat.replies else f"reply {chat.calls}"
+
+    monkeypatch.setattr(chat, "_dispatch", dispatch)
+    return chat
+
+
+def test_make_key_is_order_independent_and_distinct():
+    assert make_key(model="m", prompt="p") == make_key(prompt="p", model="m")
+    assert make_key(model="m", prompt="p") != make_key(model="m", prompt="q")
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ExactLLMCache(maxsize=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+
+
+def test_sqlite_tier_survives_new_instance(tmp_path):
+    db_path = str(tmp_path / "llm_cache.db")
+    ExactLLMCache(db_path=db_path).put("key", "stored response")
+
+    reopened = ExactLLMCache(db_path=db_path)
+    assert reopened.get("key") == "stored response"
+    assert reopened.get("other") is None
+
+
+def test_sqlite_tier_refills_memory_after_eviction(tmp_path):
+    cache = ExactLLMCache(maxsize=1, db_path=str(tmp_path / "llm_cache.db"))
+    cache.put("a", "A")
+    cache.put("b", "B")
+
+    assert cache.get("a") == "A"
+
+
+def test_identical_request_is_answered_from_cache(chat):
+    assert chat.send_message("hello") == "reply 1"
+    chat.clear_history()
+    assert chat.send_message("hello") == "reply 1"
+    assert chat.calls == 1
+
+
+@pytest.mark.parametrize("error_reply", [
+    "Ollama error: connection refused",
+    "Provider AIProvider.OLLAMA not implemented",
+])
+def test_error_replies_are_not_cached(chat, error_reply):
+    chat.replies = [error_reply]
+    assert chat.send_message("hello") == error_reply
+
+    chat.clear_history()
+    assert chat.send_message("hello") == "reply 2"
+    assert chat.calls == 2
+
+
+def test_raised_errors_are_not_cached(chat, monkeypatch):
+    def fail(message, image_path):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(chat, "_dispatch", fail)
+    assert chat.send_message("hello") == "Error: boom"
+    assert len(chat._response_cache._entries) == 0
+
+
+def test_image_change_misses_cache(chat, tmp_path):
+    image = tmp_path / "shot.png"
+    image.write_bytes(b"first image")
+    key = chat._cache_key("describe", str(image), [])
+
+    assert chat._cache_key("describe", str(image), []) == key
+
+    # Same size, new mtime
+    stat = image.stat()
+    os.utime(image, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    touched_key = chat._cache_key("describe", str(image), [])
+    assert touched_key != key
+
+    # New size
+    image.write_bytes(b"a different, longer image")
+    assert chat._cache_key("describe", str(image), []) not in (key, touched_key)
+
+
+def test_edited_image_is_sent_again(chat, tmp_path):
+    image = tmp_path / "shot.png"
+    image.write_bytes(b"first image")
+
+    assert chat.send_message("describe", str(image)) == "reply 1"
+    chat.clear_history()
+    assert chat.send_message("describe", str(image)) == "reply 1"
+
+    image.write_bytes(b"a different, longer image")
+    chat.clear_history()
+    assert chat.send_message("describe", str(image)) == "reply 2"
+    assert chat.calls == 2
+
+
+class RecordingSemanticCache:
+    """Semantic tier stand-in that records which prompts reach it"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def get(self, scope, prompt):
+        self.prompts.append(prompt)
+        return None
+
+    def put(self, scope, prompt, response):
+        self.prompts.append(prompt)
+
+
+def test_semantic_tier_used_for_free_form_prompts_only(chat):
+    chat._semantic_cache = RecordingSemanticCache()
+
+    chat.send_message("free-form question")
+    chat.clear_history()
+    chat.send_message("templated prompt", cache_key=("summary", "v1"))
+
+    assert chat._semantic_cache.prompts == ["free-form question", "free-form question"]
+
+
+def test_batch_prompts_skip_semantic_tier(chat):
+    chat._semantic_cache = RecordingSemanticCache()
+
+    async def dispatch_async(message, image_path, history):
+        return f"reply to {message}"
+
+    chat._dispatch_async = dispatch_async
+    responses = asyncio.run(chat.send_messages_batch(["a", "b"]))
+
+    assert responses == ["reply to a", "reply to b"]
+    assert chat._semantic_cache.prompts == []
+
+
+def fake_embed(text):
+    # Prompts sharing a first word are treated as paraphrases
+    return [1.0, 0.0] if text.split()[0] == "hello" else [0.0, 1.0]
+
+
+def test_semantic_cache_saves_after_delay_and_reloads(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(ai_cache, "SEMANTIC_SAVE_DELAY_SECONDS", 60)
+    path = str(tmp_path / "semantic_cache.npz")
+
+    cache = SemanticCache(fake_embed, path=path)
+    cache.put("scope", "hello there", "a greeting")
+    cache.put("scope", "bye now", "a farewell")
+
+    # Nothing is written on the request path
+    assert cache.get("scope", "hello again") == "a greeting"
+    assert not (tmp_path / "semantic_cache.npz").exists()
+
+    cache.flush()
+    reopened = SemanticCache(fake_embed, path=path)
+    assert reopened.get("scope", "hello again") == "a greeting"
+    assert reopened.get("scope", "bye then") == "a farewell"
+    assert reopened.get("other scope", "hello again") is None
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["semantic_cache.json", "semantic_cache.npz"]
+
+
+def test_semantic_cache_ignores_files_from_different_saves(tmp_path):
+    pytest.importorskip("numpy")
+    path = str(tmp_path / "semantic_cache.npz")
+
+    cache = SemanticCache(fake_embed, path=path)
+    cache.put("scope", "hello there", "first")
+    cache.flush()
+    stale_text = (tmp_path / "semantic_cache.json").read_text()
+    cache.put("scope", "hello there", "second")
+    cache.flush()
+    (tmp_path / "semantic_cache.json").write_text(stale_text)
+
+    assert SemanticCache(fake_embed, path=path).get("scope", "hello there") is None
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test config lookups through the flat key index, the change version and the debounced save
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add project to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from snapmark import config as config_module
+from snapmark.config import Config
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    # Long enough that only flush() writes during a test
+    monkeypatch.setattr(config_module, "SAVE_DELAY_SECONDS", 60)
+    config_file = str(tmp_path / "config.json")
+    config = Config(config_file)
+    yield config
+    if config._save_timer:
+        config._save_timer.cancel()
+    Config._instances.pop(config_file, None)
+
+
+def saved(config):
+    return json.loads(Path(config.config_file).read_text())
+
+
+def test_one_instance_per_config_file(config, tmp_path):
+    assert Config(config.config_file) is config
+    other = Config(str(tmp_path / "other.json"))
+    try:
+        assert other is not config
+    finally:
+        Config._instances.pop(other.config_file, None)
+
+
+def test_get_reads_nested_keys_by_dotted_path(config):
+    assert config.get("output_directory") == "SnapMarkData"
+    assert config.get("storage.image_format") == "png"
+    assert config.get("storage")["image_format"] == "png"
+    assert config.get("storage.missing", "default") == "default"
+    assert config.get("output_directory.nested") is None
+
+
+def test_set_creates_missing_parents(config):
+    config.set("plugins.example.enabled", True)
+
+    assert config.get("plugins.example.enabled") is True
+    assert config.get("plugins.example") == {"enabled": True}
+    assert config.config["plugins"]["example"]["enabled"] is True
+
+
+def test_set_replacing_a_section_reindexes_it(config):
+    config.set("storage", {"image_format": "jpeg"})
+
+    assert config.get("storage.image_format") == "jpeg"
+    # Keys of the old section are gone from the index
+    assert config.get("storage.image_quality") is None
+
+    config.set("storage", "flat value")
+    assert config.get("storage.image_format") is None
+
+
+def test_version_changes_on_every_change(config):
+    version = config.version
+
+    config.set("storage.image_format", "jpeg")
+    assert config.version > version
+
+    version = config.version
+    config.config = config.load_config()
+    assert config.version > version
+
+
+def test_assigning_config_rebuilds_index(config):
+    config.config = {"storage": {"image_format": "jpeg"}}
+
+    assert config.get("storage.image_format") == "jpeg"
+    assert config.get("output_directory") is None
+
+
+def test_set_is_saved_on_flush(config):
+    config.set("storage.image_format", "jpeg")
+    config.set("storage.image_quality", 70)
+
+    # Both changes are still pending
+    assert saved(config)["storage"]["image_format"] == "png"
+    assert config._save_timer is not None
+
+    config.flush()
+    assert saved(config)["storage"]["image_format"] == "jpeg"
+    assert saved(config)["storage"]["image_quality"] == 70
+    assert config._save_timer is None
+    assert not Path(config.config_file + ".tmp").exists()
+
+
+def test_flush_without_changes_does_not_write(config):
+    Path(config.config_file).write_text("{}")
+
+    config.flush()
+    assert saved(config) == {}
+
+
+def test_pending_changes_are_saved_after_the_delay(config, monkeypatch):
+    monkeypatch.setattr(config_module, "SAVE_DELAY_SECONDS", 0.01)
+
+    config.set("storage.image_format", "jpeg")
+
+    deadline = time.monotonic() + 5
+    while saved(config)["storage"]["image_format"] != "jpeg":
+        assert time.monotonic() < deadline, "config was not saved"
+        time.sleep(0.01)
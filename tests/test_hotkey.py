@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test hotkey matching on the pressed-key bitmask, driving the listener callbacks directly
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# pynput needs a display (or another input backend) to import
+keyboard = pytest.importorskip("pynput.keyboard")
+Key, KeyCode = keyboard.Key, keyboard.KeyCode
+
+from snapmark.core.hotkey import HotkeyManager
+
+S = KeyCode.from_char('s')
+A = KeyCode.from_char('a')
+
+
+@pytest.fixture
+def manager():
+    manager = HotkeyManager()
+    manager.fired = []
+    return manager
+
+
+def register(manager, hotkey):
+    manager.register_hotkey(hotkey, lambda: manager.fired.append(hotkey))
+
+
+def press(manager, *keys):
+    for key in keys:
+        manager._on_press(key)
+
+
+def release(manager, *keys):
+    for key in keys:
+        manager._on_release(key)
+
+
+def test_fires_when_all_keys_are_down_in_any_order(manager):
+    register(manager, "ctrl+shift+s")
+
+    press(manager, Key.ctrl, Key.shift)
+    assert manager.fired == []
+
+    press(manager, S)
+    assert manager.fired == ["ctrl+shift+s"]
+
+    release(manager, Key.ctrl, Key.shift, S)
+    press(manager, S, Key.shift, Key.ctrl)
+    assert manager.fired == ["ctrl+shift+s"] * 2
+
+
+def test_fires_once_per_press_until_released(manager):
+    register(manager, "ctrl+s")
+
+    press(manager, Key.ctrl, S)
+    # OS key repeat sends more presses while the keys are held
+    press(manager, S, S, Key.ctrl)
+    assert manager.fired == ["ctrl+s"]
+
+    # Releasing one key of the combination re-arms it
+    release(manager, S)
+    press(manager, S)
+    assert manager.fired == ["ctrl+s"] * 2
+
+
+def test_extra_keys_do_not_rearm_a_held_hotkey(manager):
+    register(manager, "ctrl+s")
+
+    press(manager, Key.ctrl, S)
+    press(manager, A)
+    release(manager, A)
+    press(manager, A)
+    assert manager.fired == ["ctrl+s"]
+
+
+def test_only_satisfied_hotkeys_fire(manager):
+    register(manager, "ctrl+s")
+    register(manager, "ctrl+shift+s")
+    register(manager, "alt+a")
+
+    press(manager, Key.ctrl, S)
+    assert manager.fired == ["ctrl+s"]
+
+    press(manager, Key.shift)
+    assert manager.fired == ["ctrl+s", "ctrl+shift+s"]
+
+
+def test_release_clears_pressed_mask(manager):
+    register(manager, "ctrl+s")
+
+    press(manager, Key.ctrl, S)
+    release(manager, S, Key.ctrl)
+    assert manager.pressed_mask == 0
+    assert not manager._fired
+
+
+def test_unregistered_hotkey_no_longer_fires(manager):
+    register(manager, "ctrl+s")
+    manager.unregister_hotkey("ctrl+s")
+
+    press(manager, Key.ctrl, S)
+    assert manager.fired == []
+
+
+def test_unparseable_hotkey_never_fires(manager):
+    register(manager, "nonsense")
+
+    press(manager, Key.ctrl, S, A)
+    assert manager.fired == []
+
+
+def test_failing_callback_does_not_stop_others(manager):
+    def fail():
+        raise RuntimeError("boom")
+
+    manager.register_hotkey("ctrl+s", fail)
+    register(manager, "ctrl+shift+s")
+
+    press(manager, Key.ctrl, Key.shift, S)
+    assert manager.fired == ["ctrl+shift+s"]
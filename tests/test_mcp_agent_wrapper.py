@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test base64 detection and tool classification used to filter large data from mcp-use agent steps
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add project to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from snapmark.core.mcp_agent_wrapper import (
+    _MIN_BASE64_RUN, _has_base64_run, _is_encoded_image, _texts_with_base64_runs,
+    classify_text_tools
+)
+
+RUN = "A" * _MIN_BASE64_RUN
+SHORT_RUN = "A" * (_MIN_BASE64_RUN - 1)
+HALF = "A" * (_MIN_BASE64_RUN // 2)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("", False),
+    (RUN, True),
+    (SHORT_RUN, False),
+    (f"prefix {RUN} suffix", True),
+    (f"prefix {SHORT_RUN} suffix", False),
+    # The whole base64 alphabet counts towards a run
+    ("aZ0+/" * (_MIN_BASE64_RUN // 5), True),
+    # Any other character breaks it
+    (f"{HALF} {HALF}", False),
+    (f"{HALF}\n{HALF}", False),
+    (f"{HALF}={HALF}", False),
+    # Latin-1 letters are not base64
+    ("é" * (_MIN_BASE64_RUN * 2), False),
+    # Characters outside latin-1 still break runs and don't shift anything
+    (f"{HALF}中{HALF}", False),
+    ("中文 " * 100 + RUN, True),
+    ("中" * (_MIN_BASE64_RUN * 2), False),
+])
+def test_has_base64_run(text, expected):
+    assert _has_base64_run(text) is expected
+
+
+@pytest.mark.parametrize("texts, expected", [
+    ([], set()),
+    ([""], set()),
+    ([RUN], {0}),
+    ([SHORT_RUN], set()),
+    # Runs split across the newline that joins two texts must not match
+    ([HALF, HALF], set()),
+    ([SHORT_RUN, "A"], set()),
+    (["A", SHORT_RUN], set()),
+    # Several flagged texts in one batch
+    (["plain prose", RUN, "more prose", RUN + " tail"], {1, 3}),
+    ([RUN, RUN, RUN], {0, 1, 2}),
+    # Several runs in one text are reported once
+    ([f"{RUN} {RUN} {RUN}", "text"], {0}),
+    # Non-latin-1 text keeps offsets aligned with the right text
+    (["中" * 10, RUN], {1}),
+    (["中" * 1000 + RUN, "x", RUN + "中"], {0, 2}),
+    (["中文" * 300, SHORT_RUN + "中" + "A", "é" + RUN], {2}),
+    # Empty texts between matches
+    ([RUN, "", "", RUN], {0, 3}),
+])
+def test_texts_with_base64_runs(texts, expected):
+    assert _texts_with_base64_runs(texts) == expected
+    # The batch scan agrees with scanning each text on its own
+    assert expected == {i for i, text in enumerate(texts) if _has_base64_run(text)}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("data:image/png;base64," + RUN, True),
+    ("iVBORw0KGgoAAAANSUhEUg" + RUN, True),
+    ("/9j/4AAQSkZJRgABAQ" + RUN, True),
+    # Image data a little way into the observation
+    ('{"type": "image", "data": "iVBORw0KGgo' + RUN, True),
+    # Large text returned by an image tool is not image data
+    ("- button \"Submit\" [ref=e12]\n" * 200, False),
+    ("Recognized text: " + "lorem ipsum " * 200, False),
+    ("x" * 200 + "iVBORw0KGg", False),
+])
+def test_is_encoded_image(text, expected):
+    assert _is_encoded_image(text) is expected
+
+
+def tool(name, description=""):
+    return SimpleNamespace(name=name, description=description)
+
+
+def test_classify_text_tools_only_trusts_plain_text_tools():
+    tools = [
+        tool("search_notes", "Full-text search over notes"),
+        tool("add_row", "Append a row to a spreadsheet"),
+        tool("browser_take_screenshot", "Capture the page"),
+        tool("ocr", "Extract the text from an image"),
+        tool("read_file", "Read a file"),
+        tool("get", "Fetch a URL"),
+        tool("no_description", None),
+    ]
+
+    assert classify_text_tools(tools) == {"search_notes", "add_row", "no_description"}
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test the stdio MCP session pool and its response demultiplexing, against a fake server
+"""
+
+import asyncio
+import gc
+import sys
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+# Add project to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from snapmark.core.mcp_client import MCPServerConfig, MCPSessionPool
+
+FAKE_SERVER = MCPServerConfig(
+    name="fake",
+    command=sys.executable,
+    args=[str(Path(__file__).parent / "fake_mcp_server.py")]
+)
+
+
+def call(name, **arguments):
+    return ("tools/call", {"name": name, "arguments": arguments})
+
+
+@pytest_asyncio.fixture
+async def pool():
+    pool = MCPSessionPool(ttl=60, init_timeout=10)
+    yield pool
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_session_is_reused_across_acquires(pool):
+    async with pool.acquire(FAKE_SERVER) as first:
+        tools = await first.request("tools/list", {}, timeout=5)
+        first.tools_cache = tools["result"]["tools"]
+
+    async with pool.acquire(FAKE_SERVER) as second:
+        assert second is first
+        assert second.process.pid == first.process.pid
+        assert second.tools_cache == first.tools_cache
+        # The handshake ran once, on the same server process
+        assert second.init_response["result"]["serverInfo"]["pid"] == first.process.pid
+
+
+@pytest.mark.asyncio
+async def test_tools_list_skips_notifications_and_non_json(pool):
+    async with pool.acquire(FAKE_SERVER) as session:
+        response = await session.request("tools/list", {}, timeout=5)
+
+    assert [tool["name"] for tool in response["result"]["tools"]] == ["echo", "slow", "hang", "exit"]
+
+
+@pytest.mark.asyncio
+async def test_batch_responses_routed_by_id_when_out_of_order(pool):
+    async with pool.acquire(FAKE_SERVER) as session:
+        # The slowest request is sent first, so its reply arrives last
+        responses = await session.request_many([
+            call("slow", delay=0.4, n=0),
+            call("slow", delay=0.2, n=1),
+            call("echo", n=2),
+        ], timeout=5)
+
+    assert [response["result"]["echo"]["n"] for response in responses] == [0, 1, 2]
+    assert not session.pending
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_routed_by_id(pool):
+    async with pool.acquire(FAKE_SERVER) as session:
+        responses = await asyncio.gather(*(
+            session.request(*call("slow", delay=0.05 * (5 - n), n=n), timeout=5)
+            for n in range(5)
+        ))
+
+    assert [response["result"]["echo"]["n"] for response in responses] == list(range(5))
+
+
+@pytest.mark.asyncio
+async def test_slow_request_does_not_block_others(pool):
+    async with pool.acquire(FAKE_SERVER) as session:
+        slow = asyncio.create_task(session.request(*call("slow", delay=1.0), timeout=5))
+        fast = await asyncio.wait_for(session.request(*call("echo", n=1), timeout=5), timeout=0.5)
+        assert fast["result"]["echo"] == {"n": 1}
+        assert not slow.done()
+        await slow
+
+
+@pytest.mark.asyncio
+async def test_timeout_marks_session_broken_and_next_acquire_replaces_it(pool):
+    async with pool.acquire(FAKE_SERVER) as session:
+        responses = await session.request_many([call("hang"), call("echo", n=1)], timeout=0.5)
+
+        assert isinstance(responses[0], TimeoutError)
+        assert responses[1]["result"]["echo"] == {"n": 1}
+        assert session.broken
+        old_process = session.process
+
+    async with pool.acquire(FAKE_SERVER) as replacement:
+        assert replacement is not session
+        assert replacement.process.pid != old_process.pid
+        response = await replacement.request(*call("echo", n=2), timeout=5)
+        assert response["result"]["echo"] == {"n": 2}
+
+    assert old_process.returncode is not None
+
+
+@pytest.mark.asyncio
+async def test_eof_fails_all_pending_requests(pool):
+    async with pool.acquire(FAKE_SERVER) as session:
+        responses = await session.request_many([call("hang"), call("hang"), call("exit")], timeout=5)
+
+        assert all(isinstance(response, ConnectionError) for response in responses)
+        assert session.broken
+        assert not session.pending
+
+        # Later requests fail at once instead of waiting for a reply
+        with pytest.raises(ConnectionError):
+            await session.request(*call("echo"), timeout=5)
+
+    async with pool.acquire(FAKE_SERVER) as replacement:
+        assert replacement is not session
+
+
+@pytest.mark.asyncio
+async def test_failure_inside_acquire_drops_session(pool):
+    with pytest.raises(RuntimeError):
+        async with pool.acquire(FAKE_SERVER) as session:
+            raise RuntimeError("boom")
+
+    async with pool.acquire(FAKE_SERVER) as replacement:
+        assert replacement is not session
+
+
+# The first loop is closed while its server transport is alive, which is the case under
+# test; the transport then complains when it is garbage collected
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnraisableExceptionWarning")
+def test_bind_loop_drops_sessions_from_another_loop():
+    pool = MCPSessionPool(ttl=60, init_timeout=10)
+
+    async def acquire_session():
+        async with pool.acquire(FAKE_SERVER) as session:
+            await session.request(*call("echo"), timeout=5)
+            return session
+
+    first = asyncio.run(acquire_session())
+    first_pid = first.process.pid
+    del first
+
+    async def acquire_on_new_loop():
+        try:
+            second = await acquire_session()
+            assert list(pool._sessions.values()) == [second]
+            return second
+        finally:
+            await pool.close()
+
+    second = asyncio.run(acquire_on_new_loop())
+
+    assert second.process.pid != first_pid
+    # Collect the dropped transport here, where its warning is expected
+    gc.collect()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test the shared tesserocr engine pool and the single cached OCR pass
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add project to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip("pytesseract")
+
+from snapmark.core import ocr
+from snapmark.core.ocr import OCRProcessor, _EnginePool
+
+
+class FakeEngine:
+    """Stands in for tesserocr.PyTessBaseAPI, tracking how many are alive"""
+
+    alive = 0
+    created = 0
+    fail = False
+    lock = threading.Lock()
+
+    def __init__(self, lang, psm, oem):
+        if FakeEngine.fail:
+            raise RuntimeError("Failed to init API, possibly an invalid tessdata path")
+        self.lang = lang
+        self.ended = False
+        with FakeEngine.lock:
+            FakeEngine.alive += 1
+            FakeEngine.created += 1
+
+    def End(self):
+        assert not self.ended
+        self.ended = True
+        with FakeEngine.lock:
+            FakeEngine.alive -= 1
+
+
+@pytest.fixture
+def fake_tesserocr(monkeypatch):
+    FakeEngine.alive = FakeEngine.created = 0
+    monkeypatch.setattr(ocr, "tesserocr", SimpleNamespace(
+        PyTessBaseAPI=FakeEngine,
+        PSM=SimpleNamespace(SINGLE_BLOCK=6),
+        OEM=SimpleNamespace(DEFAULT=3),
+    ))
+
+
+def test_pool_bounds_engines_per_language(fake_tesserocr):
+    pool = _EnginePool(2)
+    busy = 0
+    most_busy = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal busy, most_busy
+        with pool.engine("eng"):
+            with lock:
+                busy += 1
+                most_busy = max(most_busy, busy)
+            time.sleep(0.02)
+            with lock:
+                busy -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert most_busy == 2
+    assert FakeEngine.created == 2
+
+    # Another language gets engines of its own
+    with pool.engine("deu") as engine:
+        assert engine.lang == "deu"
+    assert FakeEngine.created == 3
+
+
+def test_close_ends_idle_and_returned_engines(fake_tesserocr):
+    pool = _EnginePool(2)
+    with pool.engine("eng"):
+        pass
+
+    with pool.engine("eng") as lent:
+        pool.close()
+        # The idle engine is ended at once, the lent one stays usable
+        assert FakeEngine.alive == 1
+        assert not lent.ended
+    assert lent.ended
+    assert FakeEngine.alive == 0
+
+    # The pool keeps working, with new engines
+    with pool.engine("eng") as engine:
+        assert engine is not lent
+    pool.close()
+    assert FakeEngine.alive == 0
+
+
+def test_failed_engine_creation_frees_its_slot(fake_tesserocr):
+    pool = _EnginePool(1)
+    FakeEngine.fail = True
+    try:
+        with pytest.raises(RuntimeError):
+            with pool.engine("missing"):
+                pass
+    finally:
+        FakeEngine.fail = False
+
+    # Otherwise this would wait forever for the slot
+    with pool.engine("missing") as engine:
+        assert not engine.ended
+
+
+@pytest.fixture
+def text_image(tmp_path):
+    from PIL import Image, ImageDraw
+
+    # Default bitmap font, scaled up to a size Tesseract reads reliably
+    image = Image.new("RGB", (80, 20), "white")
+    ImageDraw.Draw(image).text((8, 4), "HELLO OCR", fill="black")
+    path = tmp_path / "text.png"
+    image.resize((640, 160), Image.LANCZOS).save(path)
+    return str(path)
+
+
+def test_tesserocr_smoke(text_image):
+    pytest.importorskip("tesserocr")
+    ocr._file_to_result.cache_clear()
+    processor = OCRProcessor(lang="eng")
+
+    # Both calls share one recognition pass
+    assert processor.is_text_detected(text_image)
+    assert "HELLO" in processor.extract_text(text_image).upper()
+    assert ocr._file_to_result.cache_info().misses == 1
+
+    ocr.close_engines()
+    # Engines are created again after being closed
+    assert "HELLO" in processor.extract_text(text_image, image_data=Path(text_image).read_bytes()).upper()
+    ocr.close_engines()
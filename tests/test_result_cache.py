@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test the on-disk OCR/VLM result cache
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add project to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from snapmark.utils.cache import ResultCache
+
+
+def entry(n):
+    # Each entry is about 1 KB on disk
+    return {"ocr": "x" * 1000, "n": n}
+
+
+def small_cache(tmp_path, entries):
+    # Room for `entries` entries of about 1 KB each
+    return ResultCache(str(tmp_path), max_mb=(entries * 1030) / (1024 * 1024))
+
+
+def test_identical_image_hits_cache(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    image = b"\x89PNG fake image bytes"
+
+    cache.put(ResultCache.hash_bytes(image), {"ocr": "hello", "vlm": "a screen"})
+
+    assert cache.get(ResultCache.hash_bytes(image)) == {"ocr": "hello", "vlm": "a screen"}
+    assert cache.get(ResultCache.hash_bytes(image + b"!")) is None
+    # A second instance (e.g. after a restart) reads the same entry
+    assert ResultCache(str(tmp_path)).get(ResultCache.hash_bytes(image))["ocr"] == "hello"
+
+
+def test_hash_file_matches_hash_bytes(tmp_path):
+    data = os.urandom(3 * 1024 * 1024)
+    image = tmp_path / "image.png"
+    image.write_bytes(data)
+
+    assert ResultCache.hash_file(str(image)) == ResultCache.hash_bytes(data)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = small_cache(tmp_path, 3)
+    for key in ("a", "b", "c"):
+        cache.put(key, entry(key))
+
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") is not None
+    cache.put("d", entry("d"))
+
+    assert cache.get("b") is None
+    for key in ("a", "c", "d"):
+        assert cache.get(key) is not None
+
+
+def test_overwriting_entry_does_not_double_count(tmp_path):
+    cache = small_cache(tmp_path, 3)
+    for _ in range(10):
+        cache.put("a", entry("a"))
+    cache.put("b", entry("b"))
+    cache.put("c", entry("c"))
+
+    for key in ("a", "b", "c"):
+        assert cache.get(key) is not None
+
+
+def test_eviction_order_survives_restart(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    for i, key in enumerate(("old", "mid", "new")):
+        cache.put(key, entry(key))
+        stamp = 1_000_000 + i
+        os.utime(tmp_path / f"{key}.json", (stamp, stamp))
+
+    reopened = small_cache(tmp_path, 3)
+    reopened.put("newest", entry("newest"))
+
+    assert not (tmp_path / "old.json").exists()
+    for key in ("mid", "new", "newest"):
+        assert (tmp_path / f"{key}.json").exists()
+
+
+def test_put_leaves_no_temp_files(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put("a", entry("a"))
+    cache.put("a", entry("a2"))
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.json"]
+    assert cache.get("a")["n"] == "a2"
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test that concurrent screenshot captures never share a file name
+"""
+
+import sys
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# Add project to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from snapmark.core.screenshot import ScreenshotCapture
+
+
+NOW = datetime(2025, 1, 2, 13, 32, 20)
+
+
+def test_same_second_gets_counter_suffix(tmp_path):
+    capture = ScreenshotCapture(str(tmp_path))
+
+    first = capture._reserve_path(NOW, "png")
+    second = capture._reserve_path(NOW, "png")
+    third = capture._reserve_path(NOW, "png")
+
+    assert first.name == "screen_13-32-20.png"
+    assert second.name == "screen_13-32-20-1.png"
+    assert third.name == "screen_13-32-20-2.png"
+    assert first.parent == tmp_path / "2025" / "01" / "02"
+
+
+def test_concurrent_reservations_are_unique(tmp_path):
+    capture = ScreenshotCapture(str(tmp_path))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        paths = list(pool.map(lambda _: capture._reserve_path(NOW, "png"), range(32)))
+
+    assert len(set(paths)) == 32
+    assert all(path.exists() for path in paths)
+
+
+def test_removed_day_directory_is_recreated(tmp_path):
+    capture = ScreenshotCapture(str(tmp_path))
+    capture._reserve_path(NOW, "png")
+
+    shutil.rmtree(tmp_path / "2025")
+    path = capture._reserve_path(NOW, "png")
+
+    assert path.name == "screen_13-32-20.png"
+    assert path.exists()